@@ -1,133 +1,272 @@
 from datetime import datetime
 import streamlit as st
-import torch
-from transformers import pipeline
-from logic.chat_history import ChatHistory
+from logic.answer_cache import answer_cache
+from logic.assistant import (
+    MODEL_DEVICE, SESSION_MODELS, SMART_SUGGESTIONS,
+    answer_key, answer_question, answer_suggestions, save_summary, stream_answer, summarize_text
+)
+from logic.chat_history import HISTORY_PAGE_SIZE, ChatHistory
+from logic.model_registry import registry
 from logic.ui_components import (
-    chat_message_ui,
+    chat_message_ui, inject_styles,
     sidebar_chat_history_ui, user_input_ui
 )
-from logic.utils import extract_text_from_image, extract_text_from_pdf
+from logic.document_store import content_hash, document_store
+from logic.jobs import ACTIVE_STATUSES, job_runner
+from logic.quiz import QUIZ_SIZES, cached_quiz, generate_quiz, quiz_key
+from logic.progress import completed_steps, dashboard_stats, init_progress, record_quiz_attempt, update_steps
+from logic.resources import resource_fetcher
+from logic.study_plan import MAX_WEEKS, generate_study_plan, init_study_plans, latest_plan
+from logic.ocr import ocr_image_files
+from logic.utils import iter_pdf_pages
+from logic.warmup import warmup
+from logic.render_stats import fragment, record_run, widget_count
+from logic.metrics import metrics
+from logic.metrics_server import start_metrics_server, update_process_gauges
+import io
+import json
+import time
 import uuid
 
 # --- Init ---
 ChatHistory.init_db()
+init_study_plans()
+init_progress()
 st.set_page_config(page_title="EduMate", layout="wide", page_icon="📚")
+run_started = time.perf_counter()
+try:
+    start_metrics_server()
+except OSError as exc:
+    st.sidebar.caption(f"⚠️ Metrics endpoint unavailable: {exc}")
 
 # --- Load Models Once ---
+# Pipelines live in the process-wide registry. Sessions hold no references,
+# so a closed tab never pins a model and the memory budget can evict it.
 def load_models():
-    if "models_loaded" not in st.session_state:
-        with st.spinner("Preparing your EduMate Assistant..."):
-            device = -1  
-            st.session_state.qa_pipeline = pipeline(
-                "question-answering",
-                model="deepset/tinyroberta-squad2",
-                device=device
-            )
-            st.session_state.summarizer = pipeline(
-                "summarization",
-                model="t5-small",
-                device=device
+    # Models load on a background thread so the first page renders at once.
+    if st.session_state.get("models_loaded"):
+        return
+    warmup.start((task, model, {"device": MODEL_DEVICE}) for task, model in SESSION_MODELS.values())
+    if not warmup.done:
+        st.sidebar.caption("⏳ Loading models in the background...")
+        return
+    st.session_state.models_loaded = True
+
+
+# --- Document Cache ---
+def extract_pdf_with_progress(data):
+    progress_bar = st.progress(0.0, text="📄 Reading document...")
+    pages = []
+    with metrics.span("pdf_extract"):
+        for page in iter_pdf_pages(data):
+            pages.append(page.text)
+            progress_bar.progress(len(pages) / page.total, text=f"📄 Reading page {len(pages)} of {page.total}...")
+    metrics.inc("pdf_pages_total", len(pages))
+    progress_bar.empty()
+    return pages
+
+
+def load_document(uploaded_files):
+    # One PDF, or any number of images read as the pages of one document.
+    # Reruns of the same upload skip rehashing the bytes.
+    upload_id = tuple(getattr(f, "file_id", None) for f in uploaded_files)
+    if all(upload_id) and st.session_state.get("smart_upload_id") == upload_id:
+        doc = document_store.get(st.session_state.smart_doc_hash)
+        if doc:
+            return doc
+    if uploaded_files[0].type == "application/pdf":
+        doc = document_store.get_or_extract(uploaded_files[0].getvalue(), "pdf", extract_pdf_with_progress)
+    else:
+        files = [f.getvalue() for f in uploaded_files]
+        # A single image keeps the key of its own bytes; a set is keyed by
+        # the hashes of its images in upload order.
+        key = files[0] if len(files) == 1 else "".join(content_hash(data) for data in files).encode("ascii")
+        with st.spinner(f"🔎 Reading {len(files)} image(s)..."):
+            doc = document_store.get_or_extract(
+                key, "image", lambda _: ocr_image_files([io.BytesIO(data) for data in files])
             )
-        st.session_state.models_loaded = True
-
-# --- Prompt Logic ---
-def get_context_prompt(level):
-    return {
-        "Basic": "Explain simply like to a 10-year-old: ",
-        "SHS": "Explain for high school level: ",
-        "Tertiary": "Provide detailed academic explanation: "
-    }.get(level, "")
-
-# --- Answer ---
-def answer_question(question, context="", level="Basic"):
-    prompt = get_context_prompt(level) + question
-    result = st.session_state.qa_pipeline(
-        question=prompt,
-        context=context or prompt,
-        max_length=512
-    )
-    return result["answer"]
-
-# --- Summarize ---
-def summarize_text(text, level="Basic"):
-    prompt = f"summarize: {text}"
-    summary = st.session_state.summarizer(
-        prompt,
-        max_length=130 if level == "Basic" else 200,
-        min_length=30
-    )
-    return summary[0]["summary_text"]
+    st.session_state.smart_upload_id = upload_id
+    st.session_state.smart_doc_hash = doc["hash"]
+    return doc
+
+
+# --- Background Summaries ---
+def summary_job(job, doc_hash, text, level):
+    summary = summarize_text(text, level, progress=job.progress)
+    document_store.put_artifact(doc_hash, f"summary:{level}", summary)
+    return {"doc_hash": doc_hash, "level": level, "summary": summary}
+
+
+def suggestions_job(job, doc_hash, text, level):
+    answers = answer_suggestions(text, level, doc_hash, progress=job.progress)
+    document_store.put_artifact(doc_hash, f"suggestions:{level}", answers)
+    return {"doc_hash": doc_hash, "level": level}
+
+
+def request_suggestions(doc_hash, text, level):
+    # Answered speculatively right after extraction, once per document and level.
+    key = f"suggestions:{doc_hash}:{level}"
+    if st.session_state.get("suggestions_requested") == key:
+        return
+    st.session_state.suggestions_requested = key
+    if document_store.get_artifact(doc_hash, f"suggestions:{level}") is None:
+        job_runner.submit("suggestions", key, suggestions_job, doc_hash, text, level)
+
+
+def save_summary_chat(doc_hash, level, summary):
+    chat_id, created = save_summary(doc_hash, level, summary)
+    if not created:
+        st.toast("Summary already exists!", icon="ℹ️")
+        return
+    refresh_history()
+    st.session_state.active_chat_id = chat_id
+    st.toast("Summary generated!", icon="✅")
+    st.rerun()
+
+
+@fragment("summary_job", run_every=1.0)
+def summary_job_panel():
+    # Polls the job without rerunning the page; the student can keep working.
+    job_id = st.session_state.get("summary_job_id")
+    job = job_runner.get(job_id) if job_id else None
+    if job is None:
+        return
+    if job["status"] in ACTIVE_STATUSES:
+        st.progress(job["progress"], text=job["message"] or "🔍 Analyzing document in the background...")
+        if st.button("✖️ Cancel summary", key="cancel_summary_job"):
+            job_runner.cancel(job_id)
+        return
+    st.session_state.summary_job_id = None
+    if job["status"] == "done":
+        save_summary_chat(**job["result"])
+    elif job["status"] == "failed":
+        st.toast(f"Summary failed: {job['error']}", icon="⚠️")
+    else:
+        st.toast("Summary cancelled.", icon="✖️")
+    st.rerun()
 
 
 def cleanup_models():
-    st.session_state.pop("qa_pipeline", None)
-    st.session_state.pop("summarizer", None)
-    torch.cuda.empty_cache()
+    # Unused models are unloaded; anything asked for later loads on demand.
+    return registry.evict_idle()
+
+
+# --- History ---
+# Only id/title/pinned of one page at a time are kept in the session;
+# bodies are loaded through ChatHistory.get_chat when a chat is opened.
+# The sidebar shows one window of HISTORY_PAGE_SIZE chats at a time; the
+# keyset cursors of the windows before it make "newer" a single query too.
+def refresh_history():
+    st.session_state.history_cursors = [None]
+    load_history_window()
+
+
+def load_history_window():
+    # One extra row tells whether an older window exists.
+    page = ChatHistory.list_chats(after=st.session_state.history_cursors[-1], limit=HISTORY_PAGE_SIZE + 1)
+    st.session_state.history = page[:HISTORY_PAGE_SIZE]
+    st.session_state.history_has_more = len(page) > HISTORY_PAGE_SIZE
+    # Pinned chats are not windowed; "More pinned" raises how many are shown.
+    pinned_limit = st.session_state.setdefault("pinned_limit", HISTORY_PAGE_SIZE)
+    pinned = ChatHistory.list_chats(pinned=True, limit=pinned_limit + 1)
+    st.session_state.pinned_history = pinned[:pinned_limit]
+    st.session_state.pinned_has_more = len(pinned) > pinned_limit
+    st.session_state.history_total = ChatHistory.count_chats()
+
+
+def more_pinned_history():
+    st.session_state.pinned_limit += HISTORY_PAGE_SIZE
+    load_history_window()
+
+
+def next_history_window():
+    st.session_state.history_cursors.append(ChatHistory.page_cursor(st.session_state.history))
+    load_history_window()
+
+
+def previous_history_window():
+    if len(st.session_state.history_cursors) > 1:
+        st.session_state.history_cursors.pop()
+    load_history_window()
+
+
+def history_window_label():
+    first = (len(st.session_state.history_cursors) - 1) * HISTORY_PAGE_SIZE
+    if not st.session_state.history:
+        return ""
+    return f"{first + 1}–{first + len(st.session_state.history)} of {st.session_state.history_total:,}"
+
+
+# Searching, paging and opening menus only rerun this fragment; actions that
+# change the rest of the page ask for a full rerun themselves.
+@fragment("history")
+def render_history(key_prefix=""):
+    sidebar_chat_history_ui(
+        st.session_state.pinned_history,
+        st.session_state.history,
+        on_prev=previous_history_window if len(st.session_state.history_cursors) > 1 else None,
+        on_next=next_history_window if st.session_state.history_has_more else None,
+        on_more_pinned=more_pinned_history if st.session_state.pinned_has_more else None,
+        window_label=history_window_label(),
+        search=ChatHistory.search_chats,
+        key_prefix=key_prefix
+    )
 
 
+# --- Study Plan ---
+def set_study_plan(plan):
+    st.session_state["study_plan"] = plan["steps"] if plan else None
+    st.session_state["study_plan_id"] = plan["id"] if plan else None
+
+
+def study_plan_form(form_key, key_prefix="", submit_label="Generate Study Plan"):
+    # Shared by the sidebar and the mobile expander.
+    with st.form(form_key):
+        study_goal = st.text_input("What do you want to study? (e.g., Algebra, Photosynthesis, World War II)", key=f"{key_prefix}study_goal")
+        study_duration = st.number_input("How many weeks do you want to study?", min_value=1, max_value=MAX_WEEKS, value=1, key=f"{key_prefix}study_duration")
+        submit_plan = st.form_submit_button(submit_label)
+    if submit_plan and study_goal.strip():
+        with st.spinner("📅 Planning your weeks..."):
+            plan = generate_study_plan(
+                study_goal.strip(),
+                int(study_duration),
+                level=st.session_state.education_level,
+                style=st.session_state.get("learning_style", "")
+            )
+        set_study_plan(plan)
+        st.success("Study plan generated!")
+
+
+if "history_cursors" not in st.session_state:
+    refresh_history()
+if "study_plan" not in st.session_state:
+    # The last plan is kept in SQLite, so a reload picks it back up.
+    set_study_plan(latest_plan())
+
 # sourcery skip: 
 for key, val in {
-    "history": ChatHistory.load_history(),
     "active_chat_id": None,
     "education_level": "Basic",
-    "search_query": "",
     "dark_mode": False,
     "main_dark_mode": False,
     "paused": False,
-    "smart_context": ""
+    "smart_context": "",
+    "smart_doc_hash": None
 }.items():
     st.session_state.setdefault(key, val)
 
 load_models()
 
+# --- Chat Deletion ---
+# Handled before anything is drawn so the sidebar never shows a deleted chat.
+if st.session_state.get("delete_chat"):
+    ChatHistory.delete_chat(st.session_state["delete_chat"])
+    refresh_history()
+    if st.session_state.active_chat_id == st.session_state["delete_chat"]:
+        st.session_state.active_chat_id = None
+    st.session_state.delete_chat = None
 
-st.markdown("""
-    <style>
-    .stChatMessage { padding: 12px; }
-    .stButton button {
-        transition: all 0.2s ease-in-out;
-        border-radius: 6px;
-    }
-    .stButton button:hover {
-        background-color: #ffeb3b20;
-        transform: scale(1.05);
-    }
-    @media only screen and (max-width: 768px) {
-        section[data-testid="stSidebar"] { display: none; }
-        .mobile-sidebar-toggle { display: block; margin-bottom: 10px; }
-    }
-    @media only screen and (min-width: 769px) {
-        .mobile-sidebar-toggle { display: none; }
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-
-if st.session_state.main_dark_mode:
-    st.markdown("""
-        <style>
-        body { background-color: #121212; color: white; }
-        .stTextInput input, .stSelectbox div { background-color: #222; color: white; }
-        </style>
-    """, unsafe_allow_html=True)
-
-# --- Mobile Sidebar Toggle ---
-with st.container():
-    st.markdown(
-        """
-        <style>
-        @media only screen and (min-width: 769px) {
-            .mobile-sidebar-toggle { display: none !important; }
-        }
-        @media only screen and (max-width: 768px) {
-            .mobile-sidebar-toggle { display: block !important; margin-bottom: 10px; }
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    
+inject_styles(st.session_state.main_dark_mode)
 
 # --- Sidebar ---
 with st.sidebar:
@@ -145,53 +284,17 @@ with st.sidebar:
     st.markdown("---")
     # Study Plan Generator
     st.subheader("📝 Study Plan Generator")
-    with st.form("study_plan_form"):
-        study_goal = st.text_input("What do you want to study? (e.g., Algebra, Photosynthesis, World War II)")
-        study_duration = st.number_input("How many weeks do you want to study?", min_value=1, max_value=52, value=1)
-        submit_plan = st.form_submit_button("Generate Study Plan")
+    study_plan_form("study_plan_form")
     st.markdown("---")
     # Chat History
-    filtered_history = [
-        c for c in st.session_state.history
-        if st.session_state.search_query.lower() in c["title"].lower()
-    ]
-    sidebar_chat_history_ui(filtered_history)
+    render_history()
     
     if st.button("🧹 Free Up Memory", help="Clear loaded models from memory"):
-        cleanup_models()
-        st.success("Memory freed!")
+        freed = cleanup_models()
+        st.success(f"Memory freed! ({freed} idle model(s) unloaded)")
     st.markdown("---")
 
 
-if 'study_plan' not in st.session_state:
-    st.session_state['study_plan'] = None
-
-if submit_plan and study_goal:
-    subtopics = []
-    n = int(study_duration)
-    
-    if 'quiz_gen_pipeline' in st.session_state and st.session_state.quiz_gen_pipeline:
-        try:
-            prompt = f"List {n} important subtopics to study for {study_goal}."
-            result = st.session_state.quiz_gen_pipeline(prompt, max_length=128, num_return_sequences=1)[0]["generated_text"]
-            
-            if '\n' in result:
-                subtopics = [line.strip('- ').strip() for line in result.split('\n') if line.strip()]
-            else:
-                subtopics = [s.strip() for s in result.split(',') if s.strip()]
-            if len(subtopics) < n:
-                raise Exception("Not enough subtopics")
-        except Exception:
-            subtopics = []
-            
-    # Fallback to template
-    if not subtopics or len(subtopics) < n:
-        subtopics = [f"Subtopic {i+1} of {study_goal}" for i in range(n)]
-    plan = [f"Week {i+1}: Study {subtopics[i]}" for i in range(n)]
-    st.session_state['study_plan'] = plan
-    st.success("Study plan generated!")
-
-
 if 'show_mobile_sidebar_modal' not in st.session_state:
     st.session_state['show_mobile_sidebar_modal'] = False
 if 'mobile_sidebar_feature' not in st.session_state:
@@ -236,36 +339,9 @@ if st.session_state.get('show_mobile_sidebar_modal') and st.session_state.get('m
                 key="mobile_learning_style_radio"
             )
         elif st.session_state['mobile_sidebar_feature'] == "Study Plan Generator":
-            with st.form("mobile_study_plan_form"):
-                study_goal = st.text_input("What do you want to study? (e.g., Algebra, Photosynthesis, World War II)", key="mobile_study_goal")
-                study_duration = st.number_input("How many weeks do you want to study?", min_value=1, max_value=52, value=1, key="mobile_study_duration")
-                submit_plan = st.form_submit_button("Generate Study Plan (Mobile)")
-            if submit_plan and study_goal:
-                subtopics = []
-                n = int(study_duration)
-                if 'quiz_gen_pipeline' in st.session_state and st.session_state.quiz_gen_pipeline:
-                    try:
-                        prompt = f"List {n} important subtopics to study for {study_goal}."
-                        result = st.session_state.quiz_gen_pipeline(prompt, max_length=128, num_return_sequences=1)[0]["generated_text"]
-                        if '\n' in result:
-                            subtopics = [line.strip('- ').strip() for line in result.split('\n') if line.strip()]
-                        else:
-                            subtopics = [s.strip() for s in result.split(',') if s.strip()]
-                        if len(subtopics) < n:
-                            raise Exception("Not enough subtopics")
-                    except Exception:
-                        subtopics = []
-                if not subtopics or len(subtopics) < n:
-                    subtopics = [f"Subtopic {i+1} of {study_goal}" for i in range(n)]
-                plan = [f"Week {i+1}: Study {subtopics[i]}" for i in range(n)]
-                st.session_state['study_plan'] = plan
-                st.success("Study plan generated!")
+            study_plan_form("mobile_study_plan_form", key_prefix="mobile_", submit_label="Generate Study Plan (Mobile)")
         elif st.session_state['mobile_sidebar_feature'] == "Chat History":
-            filtered_history = [
-                c for c in st.session_state.history
-                if st.session_state.search_query.lower() in c["title"].lower()
-            ]
-            sidebar_chat_history_ui(filtered_history)
+            render_history(key_prefix="mobile-")
 # --- App Description Card ---
 st.info(
     """
@@ -284,6 +360,211 @@ st.info(
     icon="🎓"
 )
 
+# --- Quiz ---
+def quiz_job(job, topic, level, n, context, doc_hash):
+    job.progress(0, 1, f"📝 Writing {n} questions in the background...")
+    return generate_quiz(topic, level=level, n=n, context=context, doc_hash=doc_hash)
+
+
+def set_quiz(quiz):
+    items = quiz["questions"]
+    st.session_state["quiz_questions"] = [item["question"] for item in items]
+    st.session_state["quiz_options"] = [item["options"] for item in items]
+    st.session_state["quiz_correct_indices"] = [item["correct"] for item in items]
+    st.session_state["quiz_mc_answers"] = [None for _ in items]
+    st.session_state["quiz_mc_feedback"] = None
+    st.session_state["quiz_score"] = None
+    if quiz["cached"]:
+        st.session_state["quiz_generation"] = f"{len(items)} questions from the cache"
+    elif not quiz["generated"]:
+        st.session_state["quiz_generation"] = "The quiz model is unavailable; showing template questions"
+    else:
+        st.session_state["quiz_generation"] = f"{len(items)} questions generated in {quiz['seconds']:.1f}s"
+    st.session_state["quiz_meta"] = {"topic": quiz["topic"], "level": quiz["level"]}
+
+
+@fragment("quiz_job", run_every=1.0)
+def quiz_job_panel():
+    # Polls the quiz job like summary_job_panel; other clicks don't cancel it.
+    job_id = st.session_state.get("quiz_job_id")
+    job = job_runner.get(job_id) if job_id else None
+    if job is None:
+        return
+    if job["status"] in ACTIVE_STATUSES:
+        st.progress(job["progress"], text=job["message"] or "📝 Writing your quiz...")
+        return
+    st.session_state.quiz_job_id = None
+    if job["status"] == "done":
+        set_quiz(job["result"])
+    else:
+        st.toast(f"Quiz failed: {job['error']}", icon="⚠️")
+    st.rerun()
+
+
+# Generating a quiz and answering it only rerun this fragment.
+@fragment("quiz")
+def quiz_panel():
+    st.header("📝 Auto-Generated Quiz")
+    quiz_topic = st.text_input("Enter a topic to generate a quiz:", key="quiz_topic")
+    num_questions = st.selectbox("Number of questions:", list(QUIZ_SIZES), index=0, key="num_questions")
+    use_document = False
+    if st.session_state.smart_context:
+        use_document = st.checkbox("Base questions on the uploaded document", value=True, key="quiz_use_document")
+    if st.button("Generate Quiz", key="generate_quiz", disabled=bool(st.session_state.get("quiz_job_id"))):
+        if quiz_topic.strip():
+            topic, level = quiz_topic.strip(), st.session_state.education_level
+            context = st.session_state.smart_context if use_document else ""
+            doc_hash = st.session_state.smart_doc_hash if use_document else None
+            quiz = cached_quiz(topic, level, num_questions, doc_hash)
+            if quiz is not None:
+                set_quiz(quiz)
+            else:
+                st.session_state.quiz_job_id = job_runner.submit(
+                    "quiz", f"quiz:{quiz_key(topic, level, num_questions, doc_hash)}",
+                    quiz_job, topic, level, num_questions, context, doc_hash
+                )
+                # The job panel lives outside this fragment.
+                st.rerun()
+    if "quiz_questions" in st.session_state and "quiz_options" in st.session_state:
+        if st.session_state.get("quiz_generation"):
+            st.caption(f"⏱️ {st.session_state['quiz_generation']}")
+        with st.form("quiz_form_mc"):
+            user_mc_answers = []
+            for i, (q, opts) in enumerate(zip(st.session_state["quiz_questions"], st.session_state["quiz_options"])):
+                user_mc_answers.append(st.radio(f"Q{i+1}: {q}", opts, index=st.session_state["quiz_mc_answers"][i] if st.session_state["quiz_mc_answers"][i] is not None else 0, key=f"quiz_mc_answer_{i}"))
+            submit_mc_quiz = st.form_submit_button("Submit Answers")
+        if submit_mc_quiz:
+            st.session_state["quiz_mc_answers"] = [opts.index(ans) for ans, opts in zip(user_mc_answers, st.session_state["quiz_options"])]
+            score = 0
+            feedback = []
+            for i, (user_idx, correct_idx, opts) in enumerate(zip(st.session_state["quiz_mc_answers"], st.session_state["quiz_correct_indices"], st.session_state["quiz_options"])):
+                if user_idx == correct_idx:
+                    feedback.append(f"✅ Correct! The answer is: {opts[correct_idx]}")
+                    score += 1
+                else:
+                    feedback.append(f"❌ Not quite. You chose: {opts[user_idx]}\nCorrect answer: {opts[correct_idx]}")
+            st.session_state["quiz_mc_feedback"] = feedback
+            st.session_state["quiz_score"] = score
+            meta = st.session_state.get("quiz_meta", {})
+            record_quiz_attempt(
+                meta.get("topic", st.session_state.get("quiz_topic", "")),
+                meta.get("level", st.session_state.education_level),
+                st.session_state["quiz_questions"],
+                st.session_state["quiz_mc_answers"],
+                st.session_state["quiz_correct_indices"]
+            )
+        if st.session_state.get("quiz_mc_feedback"):
+            st.subheader("Quiz Feedback")
+            for i, feedback in enumerate(st.session_state["quiz_mc_feedback"]):
+                st.markdown(f"**Q{i+1}:** {feedback}")
+            st.markdown(f"**Score:** {st.session_state['quiz_score']} / {len(st.session_state['quiz_questions'])}")
+
+
+# --- Progress Dashboard ---
+@fragment("dashboard")
+def dashboard_panel():
+    with st.expander("📊 Progress Dashboard", expanded=True):
+        # Filled in last, so steps ticked in this run already count.
+        summary = st.container()
+        if st.session_state.get('study_plan') and st.session_state.get('study_plan_id'):
+            st.markdown("---")
+            st.markdown("**Study Plan Steps:**")
+            plan_id = st.session_state['study_plan_id']
+            completed = completed_steps(plan_id)
+            changes = {}
+            for i, step in enumerate(st.session_state['study_plan']):
+                checked = st.checkbox(step, value=i in completed, key=f'study_step_{plan_id[:12]}_{i}')
+                if checked != (i in completed):
+                    changes[i] = checked
+            update_steps(plan_id, changes, completed)
+            done = len(completed) + sum(1 if c else -1 for c in changes.values())
+            st.markdown(f"**Completed:** {done} / {len(st.session_state['study_plan'])}")
+        stats = dashboard_stats()
+        with summary:
+            st.markdown(f"**Quizzes Taken:** {stats['quizzes_taken']}")
+            st.markdown(f"**Total Correct Answers:** {stats['total_correct']}")
+            st.markdown(f"**Average Score:** {stats['average_score']:.2f}")
+            st.markdown(f"**Accuracy:** {stats['accuracy']:.0%}")
+            st.markdown(f"**Current Streak:** {stats['streak_days']} day(s)")
+            if stats["weekly"]:
+                st.markdown("**Weekly Trend:**")
+                st.dataframe(
+                    [
+                        {"week of": w["week"], "quizzes": w["quizzes"], "accuracy": f"{w['accuracy']:.0%}",
+                         "study steps": w["steps_completed"]}
+                        for w in stats["weekly"]
+                    ],
+                    use_container_width=True
+                )
+            if stats["topics"]:
+                st.markdown("**Accuracy by Topic:**")
+                st.dataframe(
+                    [{"topic": t["topic"], "quizzes": t["quizzes"], "accuracy": f"{t['accuracy']:.0%}"} for t in stats["topics"]],
+                    use_container_width=True
+                )
+
+
+# --- Performance ---
+def summary_rows(snapshot, name, label):
+    return [
+        {
+            label: item["labels"].get(label, ""),
+            **{k: v for k, v in item["labels"].items() if k != label},
+            "count": item["count"],
+            "p50 ms": round(item["p50"] * 1000, 2),
+            "p95 ms": round(item["p95"] * 1000, 2),
+            "max ms": round(item["max"] * 1000, 2),
+        }
+        for item in snapshot["summaries"].get(name, [])
+    ]
+
+
+def cache_rows(snapshot):
+    totals = {}
+    for kind, name in ((0, "cache_hits_total"), (1, "cache_misses_total")):
+        for item in snapshot["counters"].get(name, []):
+            counts = totals.setdefault(item["labels"]["cache"], [0, 0])
+            counts[kind] += item["value"]
+    return [
+        {"cache": cache, "hits": int(hits), "misses": int(misses), "hit rate": f"{hits / (hits + misses):.0%}"}
+        for cache, (hits, misses) in sorted(totals.items())
+    ]
+
+
+@fragment("performance")
+def performance_panel():
+    st.header("⚡ Performance")
+    st.button("🔄 Refresh", key="refresh_performance")
+    update_process_gauges()
+    snapshot = metrics.snapshot()
+    gauges = {name: series[0]["value"] for name, series in snapshot["gauges"].items() if len(series) == 1}
+
+    cols = st.columns(4)
+    cols[0].metric("Memory (RSS)", f"{gauges.get('process_resident_memory_bytes', 0) / 2**20:,.0f} MB")
+    cols[1].metric("CPU time", f"{gauges.get('process_cpu_seconds', 0):,.1f} s")
+    cols[2].metric("Model memory", f"{registry.used_bytes() / 2**20:,.0f} / {registry.memory_budget_bytes / 2**20:,.0f} MB")
+    cols[3].metric("Threads", int(gauges.get("process_threads", 0)))
+
+    st.subheader("Stage latency")
+    st.dataframe(summary_rows(snapshot, "stage_seconds", "stage"), use_container_width=True)
+    st.subheader("Caches")
+    st.dataframe(cache_rows(snapshot), use_container_width=True)
+    st.subheader("Models")
+    st.dataframe(registry.stats(), use_container_width=True)
+    st.subheader("Inference")
+    for name in ("scheduler_request_seconds", "scheduler_inference_seconds", "time_to_first_token_seconds"):
+        rows = summary_rows(snapshot, name, "model")
+        if rows:
+            st.caption(name)
+            st.dataframe(rows, use_container_width=True)
+    st.subheader("Page renders")
+    st.dataframe(summary_rows(snapshot, "script_run_seconds", "scope"), use_container_width=True)
+    st.download_button(
+        "⬇️ Download metrics (JSON)", json.dumps(snapshot, indent=2), file_name="edumate-metrics.json",
+        mime="application/json", key="download_metrics"
+    )
+
+
 # --- Main Area Feature Selector ---
 main_feature = st.selectbox(
     "Select a feature to view:",
@@ -291,7 +572,8 @@ main_feature = st.selectbox(
         "Study Plan",
         "Curated Learning Resources",
         "Auto-Generated Quiz",
-        "Progress Dashboard"
+        "Progress Dashboard",
+        "Performance"
     ],
     index=0,
     key="main_feature_selector"
@@ -311,19 +593,13 @@ elif main_feature == "Curated Learning Resources":
     if st.button("Get Resources", key="get_resources"):
         if resource_topic.strip():
             with st.spinner("Fetching resources..."):
-                import requests
-                wiki_results = []
-                try:
-                    resp = requests.get(f"https://en.wikipedia.org/w/api.php?action=query&list=search&srsearch={resource_topic}&format=json")
-                    for item in resp.json()["query"]["search"][:2]:
-                        title = item["title"]
-                        url = f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
-                        wiki_results.append((title, url))
-                except Exception:
-                    wiki_results = []
-                yt_results = [
-                    ("YouTube Search", f"https://www.youtube.com/results?search_query={resource_topic.replace(' ', '+')}")
-                ]
+                fetched = resource_fetcher.fetch(resource_topic)
+                wiki_results = [(r["title"], r["url"]) for r in fetched["resources"].get("wikipedia", [])]
+                yt_results = [(r["title"], r["url"]) for r in fetched["resources"].get("youtube", [])]
+            if fetched["stale"]:
+                st.caption(f"⚠️ Showing saved results for: {', '.join(fetched['stale'])} (could not refresh)")
+            elif fetched["errors"]:
+                st.caption(f"⚠️ Could not reach: {', '.join(fetched['errors'])}")
             style = st.session_state.get("learning_style", "Reading/Writing (articles/text)")
             if "Visual" in style:
                 st.subheader("YouTube Videos (Visual)")
@@ -355,108 +631,15 @@ elif main_feature == "Curated Learning Resources":
                     st.markdown(f"- [{title}]({url})")
 
 elif main_feature == "Auto-Generated Quiz":
-    st.header("📝 Auto-Generated Quiz")
-    quiz_topic = st.text_input("Enter a topic to generate a quiz:", key="quiz_topic")
-    num_questions = st.selectbox("Number of questions:", [5, 10, 15, 20], index=0, key="num_questions")
-    if st.button("Generate Quiz", key="generate_quiz"):
-        if quiz_topic.strip():
-            questions = []
-            options = []
-            correct_indices = []
-            n = num_questions
-            if st.session_state.quiz_gen_pipeline:
-                try:
-                    prompt = f"Generate {n} multiple choice quiz questions about {quiz_topic} with 1 correct answer and 2 distractors for each. Format: Q: ...\nA) ...\nB) ...\nC) ...\nCorrect: ..."
-                    result = st.session_state.quiz_gen_pipeline(prompt, max_length=512, num_return_sequences=1)[0]["generated_text"]
-                    for block in result.split("Q:"):
-                        lines = [l.strip() for l in block.strip().split("\n") if l.strip()]
-                        if len(lines) >= 4:
-                            q = lines[0]
-                            opts = [l[3:].strip() if l.startswith(('A)', 'B)', 'C)')) else l for l in lines[1:4]]
-                            correct = lines[4].replace("Correct:", "").strip()
-                            if correct in opts:
-                                correct_idx = opts.index(correct)
-                            else:
-                                correct_idx = 0
-                            questions.append(q)
-                            options.append(opts)
-                            correct_indices.append(correct_idx)
-                        if len(questions) >= n:
-                            break
-                    if not questions:
-                        raise Exception("Parsing failed")
-                except Exception:
-                    questions = []
-                    options = []
-                    correct_indices = []
-            if not questions or len(questions) < n:
-                fallback_qs = [
-                    f"What is the main idea of {quiz_topic}?",
-                    f"List one important fact about {quiz_topic}.",
-                    f"Why is {quiz_topic} important?"
-                ]
-                fallback_opts = [
-                    ["It is a key concept.", "It is a random topic.", "It is not important."],
-                    ["It is widely studied.", "It is rarely discussed.", "It is a new discovery."],
-                    ["It has a big impact.", "It is not useful.", "It is only for fun."]
-                ]
-                fallback_correct = [0, 0, 0]
-                while len(questions) < n:
-                    idx = len(questions) % 3
-                    questions.append(fallback_qs[idx])
-                    options.append(fallback_opts[idx])
-                    correct_indices.append(fallback_correct[idx])
-            st.session_state["quiz_questions"] = questions[:n]
-            st.session_state["quiz_options"] = options[:n]
-            st.session_state["quiz_correct_indices"] = correct_indices[:n]
-            st.session_state["quiz_mc_answers"] = [None for _ in questions[:n]]
-            st.session_state["quiz_mc_feedback"] = None
-            st.session_state["quiz_score"] = None
-            if "quiz_progress" not in st.session_state:
-                st.session_state["quiz_progress"] = {"taken": 0, "correct": 0}
-    if "quiz_questions" in st.session_state and "quiz_options" in st.session_state:
-        with st.form("quiz_form_mc"):
-            user_mc_answers = []
-            for i, (q, opts) in enumerate(zip(st.session_state["quiz_questions"], st.session_state["quiz_options"])):
-                user_mc_answers.append(st.radio(f"Q{i+1}: {q}", opts, index=st.session_state["quiz_mc_answers"][i] if st.session_state["quiz_mc_answers"][i] is not None else 0, key=f"quiz_mc_answer_{i}"))
-            submit_mc_quiz = st.form_submit_button("Submit Answers")
-        if submit_mc_quiz:
-            st.session_state["quiz_mc_answers"] = [opts.index(ans) for ans, opts in zip(user_mc_answers, st.session_state["quiz_options"])]
-            score = 0
-            feedback = []
-            for i, (user_idx, correct_idx, opts) in enumerate(zip(st.session_state["quiz_mc_answers"], st.session_state["quiz_correct_indices"], st.session_state["quiz_options"])):
-                if user_idx == correct_idx:
-                    feedback.append(f"✅ Correct! The answer is: {opts[correct_idx]}")
-                    score += 1
-                else:
-                    feedback.append(f"❌ Not quite. You chose: {opts[user_idx]}\nCorrect answer: {opts[correct_idx]}")
-            st.session_state["quiz_mc_feedback"] = feedback
-            st.session_state["quiz_score"] = score
-            st.session_state["quiz_progress"]["taken"] += 1
-            st.session_state["quiz_progress"]["correct"] += score
-        if st.session_state.get("quiz_mc_feedback"):
-            st.subheader("Quiz Feedback")
-            for i, feedback in enumerate(st.session_state["quiz_mc_feedback"]):
-                st.markdown(f"**Q{i+1}:** {feedback}")
-            st.markdown(f"**Score:** {st.session_state['quiz_score']} / {len(st.session_state['quiz_questions'])}")
+    if st.session_state.get("quiz_job_id"):
+        quiz_job_panel()
+    quiz_panel()
 
 elif main_feature == "Progress Dashboard":
-    with st.expander("📊 Progress Dashboard", expanded=True):
-        quizzes_taken = st.session_state.get("quiz_progress", {}).get("taken", 0)
-        total_correct = st.session_state.get("quiz_progress", {}).get("correct", 0)
-        avg_score = (total_correct / quizzes_taken) if quizzes_taken else 0
-        st.markdown(f"**Quizzes Taken:** {quizzes_taken}")
-        st.markdown(f"**Total Correct Answers:** {total_correct}")
-        st.markdown(f"**Average Score:** {avg_score:.2f}")
-        if st.session_state.get('study_plan'):
-            st.markdown("---")
-            st.markdown("**Study Plan Steps:**")
-            if 'study_plan_completed' not in st.session_state:
-                st.session_state['study_plan_completed'] = [False] * len(st.session_state['study_plan'])
-            for i, step in enumerate(st.session_state['study_plan']):
-                st.session_state['study_plan_completed'][i] = st.checkbox(step, value=st.session_state['study_plan_completed'][i], key=f'study_step_{i}')
-            completed = sum(st.session_state['study_plan_completed'])
-            st.markdown(f"**Completed:** {completed} / {len(st.session_state['study_plan'])}")
+    dashboard_panel()
+
+elif main_feature == "Performance":
+    performance_panel()
 
 # --- Chat Options Modal ---
 if st.session_state.get("show_menu_for"):
@@ -467,53 +650,58 @@ if st.session_state.get("show_menu_for"):
 st.header("🤖 EduMate Assistant")
 
 # --- Upload & Summarize ---
-uploaded_file = st.file_uploader("📎 Upload PDF/Image", type=["pdf", "jpg", "png", "jpeg"])
-if uploaded_file:
-    text = extract_text_from_pdf(uploaded_file) if uploaded_file.type == "application/pdf" else extract_text_from_image(uploaded_file)
-    st.session_state.smart_context = text  
+uploaded_files = st.file_uploader(
+    "📎 Upload a PDF or images", type=["pdf", "jpg", "png", "jpeg"], accept_multiple_files=True
+)
+pdf_files = [f for f in uploaded_files or [] if f.type == "application/pdf"]
+if pdf_files and len(uploaded_files) > 1:
+    st.warning(f"Only {pdf_files[0].name} is used: upload one PDF, or any number of images.")
+    uploaded_files = pdf_files[:1]
+if uploaded_files:
+    doc = load_document(uploaded_files)
+    text = doc["text"]
+    # A scan that OCR found no text in has nothing to answer or quiz from.
+    st.session_state.smart_context = text if text.strip() else ""
+    if not text.strip():
+        st.warning("No text could be read from the upload.")
+    if not st.session_state.get("summary_job_id"):
+        # A reconnecting session picks the running summary back up.
+        st.session_state.summary_job_id = job_runner.active_job_id(
+            f"summary:{doc['hash']}:{st.session_state.education_level}"
+        )
+    if text.strip():
+        request_suggestions(doc["hash"], text, st.session_state.education_level)
 
     if st.button("📝 Summarize"):
-        with st.spinner("🔍 Analyzing document..."):
-            summary = summarize_text(text, st.session_state.education_level)
-            # Prevent duplicate summary chats
-            exists = any(
-                c["question"] == f"Summarize this document ({st.session_state.education_level})" and c["answer"] == summary
-                for c in st.session_state.history
+        level = st.session_state.education_level
+        summary = document_store.get_artifact(doc["hash"], f"summary:{level}")
+        if summary is None:
+            st.session_state.summary_job_id = job_runner.submit(
+                "summary", f"summary:{doc['hash']}:{level}", summary_job, doc["hash"], text, level
             )
-            if not exists:
-                chat = {
-                    "id": str(uuid.uuid4()),
-                    "title": f"Summary ({st.session_state.education_level})",
-                    "question": f"Summarize this document ({st.session_state.education_level})",
-                    "answer": summary,
-                    "pinned": False
-                }
-                ChatHistory.save_chat(chat)
-                chat_id = chat["id"]
-                st.session_state.history = ChatHistory.load_history()
-                st.session_state.active_chat_id = chat_id
-                st.toast("Summary generated!", icon="✅")
-                st.rerun()
-            else:
-                st.toast("Summary already exists!", icon="ℹ️")
+        else:
+            save_summary_chat(doc["hash"], level, summary)
+
+if st.session_state.get("summary_job_id"):
+    summary_job_panel()
 
 # --- Smart Suggestions ---
 if st.session_state.smart_context and not st.session_state.get("active_chat_id"):
     st.subheader("🪄 Smart Suggestions from Upload")
-    suggestions = [
-        "What is the main idea of the text?",
-        "Summarize in 3 key points",
-        "What is the tone or mood?",
-        "Who is the audience?"
-    ]
-    for s in suggestions:
+    level = st.session_state.education_level
+    answers = document_store.get_artifact(st.session_state.smart_doc_hash, f"suggestions:{level}") or {}
+    for s in SMART_SUGGESTIONS:
         if st.button(s, key=f"suggestion-{s}"):
             with st.spinner("💡 Thinking..."):
-                response = answer_question(
-                    s,
-                    context=st.session_state.smart_context,
-                    level=st.session_state.education_level
-                )
+                response = answers.get(s)
+                if response is None:
+                    # Not precomputed yet; answer this one now.
+                    response = answer_question(
+                        s,
+                        context=st.session_state.smart_context,
+                        level=level,
+                        doc_hash=st.session_state.smart_doc_hash
+                    )
                 chat = {
                     "id": str(uuid.uuid4()),
                     "title": s,
@@ -523,41 +711,53 @@ if st.session_state.smart_context and not st.session_state.get("active_chat_id")
                 }
                 ChatHistory.save_chat(chat)
                 chat_id = chat["id"]
-                st.session_state.history = ChatHistory.load_history()
+                refresh_history()
                 st.session_state.active_chat_id = chat_id
                 st.toast("Suggestion answered!", icon="💡")
                 st.rerun()
 
-# --- Chat Display ---
-if st.session_state.active_chat_id:
-    chat = ChatHistory.get_chat(st.session_state.active_chat_id)
-    if chat:
-        chat_message_ui({"id": chat["id"], "message": chat["question"], "timestamp": chat["created_at"]}, is_user=True)
-        chat_message_ui({"id": chat["id"], "message": chat["answer"], "timestamp": chat["updated_at"]}, is_user=False)
-
-# --- Chat Input ---
-user_input = user_input_ui()
-if user_input:
-    with st.spinner("💭 Processing..."):
-        response = answer_question(user_input, level=st.session_state.education_level)
-        chat = {
-            "id": str(uuid.uuid4()),
-            "title": f"{st.session_state.education_level} - {user_input[:25]}{'...' if len(user_input) > 25 else ''}",
-            "question": user_input,
-            "answer": response,
-            "pinned": False
-        }
-        ChatHistory.save_chat(chat)
-        chat_id = chat["id"]
-        st.session_state.history = ChatHistory.load_history()
-        st.session_state.active_chat_id = chat_id
-        st.toast("Response saved!", icon="💾")
-        st.rerun()
-
-# --- Chat Deletion ---
-if st.session_state.get("delete_chat"):
-    ChatHistory.delete_chat(st.session_state["delete_chat"])
-    st.session_state.history = ChatHistory.load_history()
-    st.session_state.active_chat_id = None
-    st.session_state.delete_chat = None
-    st.toast("Chat deleted!", icon="🗑️")
+# --- Chat Panel ---
+# The open chat and the input box rerun on their own; saving an answer
+# reruns the whole app so the sidebar history picks it up.
+@fragment("chat")
+def chat_panel():
+    if st.session_state.active_chat_id:
+        chat = ChatHistory.get_chat(st.session_state.active_chat_id)
+        if chat:
+            chat_message_ui({"id": chat["id"], "message": chat["question"], "timestamp": chat["created_at"]}, is_user=True)
+            chat_message_ui({"id": chat["id"], "message": chat["answer"], "timestamp": chat["updated_at"]}, is_user=False)
+
+    # Chat input
+    user_input = user_input_ui()
+    if user_input:
+        level = st.session_state.education_level
+        key = answer_key(user_input, level=level)
+        response = answer_cache.get(key)
+        chat_id = str(uuid.uuid4())
+        if response is None:
+            now = datetime.now().isoformat()
+            chat_message_ui({"id": chat_id, "message": user_input, "timestamp": now}, is_user=True)
+            response = chat_message_ui(
+                {"id": chat_id, "message": stream_answer(user_input, level), "timestamp": now},
+                is_user=False,
+            )
+            answer_cache.put(key, response)
+        with st.spinner("💭 Processing..."):
+            chat = {
+                "id": chat_id,
+                "title": f"{st.session_state.education_level} - {user_input[:25]}{'...' if len(user_input) > 25 else ''}",
+                "question": user_input,
+                "answer": response,
+                "pinned": False
+            }
+            ChatHistory.save_chat(chat)
+            chat_id = chat["id"]
+            refresh_history()
+            st.session_state.active_chat_id = chat_id
+            st.toast("Response saved!", icon="💾")
+            st.rerun()
+
+
+chat_panel()
+
+record_run("app", run_started, widget_count())
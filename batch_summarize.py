@@ -0,0 +1,37 @@
+"""Summarize every PDF and image under a folder without the web UI.
+
+Summaries are stored exactly as the app stores them: in the document cache
+and as chats in the history database, one per education level. Progress is
+kept in a manifest table, so an interrupted run picks up where it stopped.
+
+    python batch_summarize.py course-materials/ --levels Basic SHS --workers 4
+"""
+import argparse
+import os
+import sys
+
+from logic import db
+from logic.batch import LEVELS, run_batch
+from logic.document_store import document_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="folder to scan recursively for .pdf, .png, .jpg and .jpeg files")
+    parser.add_argument("--levels", nargs="+", choices=LEVELS, default=["Basic"])
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes, each with its own model copy (default: one per CPU)")
+    parser.add_argument("--db", default=db.DB_PATH, help="history database to write summaries to")
+    parser.add_argument("--documents", default=None,
+                        help="document cache folder (default: documents/ next to the database)")
+    args = parser.parse_args()
+
+    db.DB_PATH = args.db
+    # Documents and the chats that point at them stay together.
+    document_store.root = args.documents or os.path.join(os.path.dirname(os.path.abspath(args.db)), "documents")
+    summary = run_batch(args.folder, levels=args.levels, workers=args.workers)
+    sys.exit(1 if summary["files_failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Accuracy versus latency of each inference backend for one model.
+
+Loads the model once per backend (torch fp32, dynamic int8, ONNX Runtime)
+and runs a small built-in evaluation set. Question answering is scored
+with exact match and token F1 against reference answers; generative
+models are scored by token F1 against the fp32 output, i.e. how closely
+a faster backend reproduces the baseline. Needs the model weights (first
+run downloads them) and optimum[onnxruntime] for the onnx backend.
+
+    python -m benchmarks.bench_backends --task question-answering --model deepset/tinyroberta-squad2
+    python -m benchmarks.bench_backends --task summarization --model t5-small
+"""
+import argparse
+import re
+import statistics
+import time
+from collections import Counter
+
+from logic.backends import BACKENDS, load_pipeline, model_size_bytes
+
+QA_SET = [
+    ("What do plants need for photosynthesis?",
+     "Plants need sunlight, water and carbon dioxide for photosynthesis. The process releases oxygen.",
+     "sunlight, water and carbon dioxide"),
+    ("What does photosynthesis release?",
+     "Plants need sunlight, water and carbon dioxide for photosynthesis. The process releases oxygen.",
+     "oxygen"),
+    ("When did World War II end?",
+     "World War II began in 1939 and ended in 1945 after the surrender of Germany and Japan.",
+     "1945"),
+    ("Who surrendered at the end of the war?",
+     "World War II began in 1939 and ended in 1945 after the surrender of Germany and Japan.",
+     "Germany and Japan"),
+    ("What is the powerhouse of the cell?",
+     "The mitochondria is the powerhouse of the cell, producing energy in the form of ATP.",
+     "The mitochondria"),
+    ("What energy molecule do mitochondria make?",
+     "The mitochondria is the powerhouse of the cell, producing energy in the form of ATP.",
+     "ATP"),
+    ("What is the capital of Ghana?",
+     "Ghana is a country in West Africa. Its capital and largest city is Accra.",
+     "Accra"),
+    ("Where is Ghana?",
+     "Ghana is a country in West Africa. Its capital and largest city is Accra.",
+     "West Africa"),
+]
+
+TEXT_SET = [
+    "Photosynthesis is the process by which green plants use sunlight to turn water and carbon dioxide "
+    "into glucose and oxygen. It takes place mainly in the leaves, inside chloroplasts that contain the "
+    "green pigment chlorophyll. The glucose is used for energy and growth, and the oxygen is released.",
+    "World War II was a global conflict that lasted from 1939 to 1945. It involved most of the world's "
+    "nations, divided into the Allies and the Axis powers. It ended with the surrender of Germany in May "
+    "1945 and of Japan in September 1945, and led to the founding of the United Nations.",
+    "An algebraic equation states that two expressions are equal. Solving it means finding the values of "
+    "the unknown variables that make the statement true, for example by performing the same operation on "
+    "both sides until the variable stands alone.",
+]
+
+
+def tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def f1(prediction, reference):
+    pred, ref = tokens(prediction), tokens(reference)
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if not pred or not ref or not common:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_qa(pipe, repeat):
+    latencies, predictions = [], []
+    for _ in range(repeat):
+        predictions = []
+        for question, context, _ in QA_SET:
+            start = time.perf_counter()
+            predictions.append(pipe(question=question, context=context)["answer"])
+            latencies.append(time.perf_counter() - start)
+    references = [answer for _, _, answer in QA_SET]
+    return predictions, references, latencies
+
+
+def run_generation(pipe, repeat, max_length):
+    latencies, predictions = [], []
+    for _ in range(repeat):
+        predictions = []
+        for text in TEXT_SET:
+            start = time.perf_counter()
+            output = pipe(text, max_length=max_length, min_length=10, truncation=True)[0]
+            predictions.append(output.get("summary_text") or output.get("generated_text"))
+            latencies.append(time.perf_counter() - start)
+    return predictions, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--task", default="question-answering",
+                        choices=["question-answering", "summarization", "text2text-generation"])
+    parser.add_argument("--model", default="deepset/tinyroberta-squad2")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-length", type=int, default=60)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'backend':>8} {'size MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'EM':>6} {'F1':>6}")
+    for backend in args.backends:
+        try:
+            pipe = load_pipeline(args.task, args.model, backend, device=-1)
+        except ImportError as exc:
+            print(f"{backend:>8} skipped: {exc}")
+            continue
+        # Warm-up so one-off graph optimisation is not counted.
+        if args.task == "question-answering":
+            pipe(question=QA_SET[0][0], context=QA_SET[0][1])
+            predictions, references, latencies = run_qa(pipe, args.repeat)
+        else:
+            pipe(TEXT_SET[0], max_length=args.max_length, truncation=True)
+            predictions, latencies = run_generation(pipe, args.repeat, args.max_length)
+            if baseline is None:
+                baseline = predictions
+            references = baseline
+        exact = statistics.mean(float(tokens(p) == tokens(r)) for p, r in zip(predictions, references))
+        score = statistics.mean(f1(p, r) for p, r in zip(predictions, references))
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000
+        size = model_size_bytes(pipe) / (1024 * 1024)
+        print(f"{backend:>8} {size:>8.1f} {p50:>8.1f} {p95:>8.1f} {exact:>6.2f} {score:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
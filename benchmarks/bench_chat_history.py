@@ -0,0 +1,94 @@
+"""Chat history write throughput with concurrent writer threads.
+
+Compares the pooled, WAL, group-commit data layer with the original
+connect-per-call implementation. Run from the repository root:
+
+    python -m benchmarks.bench_chat_history --threads 1 8 32
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from logic import db
+from logic.chat_history import ChatHistory
+
+
+def legacy_save_chat(path, chat):
+    # The connect/commit-per-call write ChatHistory.save_chat used to do.
+    now = datetime.now().isoformat()
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO chats (id, title, question, answer, pinned, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (chat["id"], chat["title"], chat["question"], chat["answer"], 0, now, now),
+        )
+        conn.commit()
+
+
+def make_chat():
+    return {
+        "id": str(uuid.uuid4()),
+        "title": "Basic - What is photosynthesis?",
+        "question": "What is photosynthesis?",
+        "answer": "Photosynthesis is how plants turn light into chemical energy. " * 4,
+        "pinned": False,
+    }
+
+
+def run(save, threads, duration):
+    done = [0] * threads
+    errors = [0] * threads
+    stop = time.perf_counter() + duration
+
+    def worker(i):
+        while time.perf_counter() < stop:
+            try:
+                save(make_chat())
+                done[i] += 1
+            except sqlite3.OperationalError:
+                errors[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return sum(done) / elapsed, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="edumate-bench-")
+    print(f"{'threads':>7} {'legacy ops/s':>13} {'errors':>7} {'pooled ops/s':>13} {'errors':>7} {'speedup':>8}")
+    for threads in args.threads:
+        legacy_path = os.path.join(workdir, f"legacy-{threads}.db")
+        db.DB_PATH = legacy_path
+        ChatHistory.init_db()
+        db.get_pool(legacy_path).close_all()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+        legacy_rate, legacy_errors = run(lambda c: legacy_save_chat(legacy_path, c), threads, args.duration)
+
+        db.DB_PATH = os.path.join(workdir, f"pooled-{threads}.db")
+        ChatHistory.init_db()
+        pooled_rate, pooled_errors = run(ChatHistory.save_chat, threads, args.duration)
+
+        print(
+            f"{threads:>7} {legacy_rate:>13.0f} {legacy_errors:>7} "
+            f"{pooled_rate:>13.0f} {pooled_errors:>7} {pooled_rate / legacy_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare the page-level PDF extraction engine with the original loop.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pdf_extraction --sizes 10 100 500
+    python -m benchmarks.bench_pdf_extraction --sizes 10 --engine legacy serial --rounds 15
+
+Every engine runs once untimed, then the engines take turns, starting with
+a different one each round, so neither warm-up nor machine noise favours
+whichever runs first. Medians are reported, with the ratio to legacy.
+"""
+import argparse
+import io
+import statistics
+import time
+
+import pdfplumber
+
+from benchmarks.synthetic import make_pdf
+from logic.utils import available_cpus, iter_pdf_pages
+
+ENGINES = ("legacy", "serial", "parallel")
+
+
+def legacy_extract_text_from_pdf(pdf_file):
+    # The implementation logic/utils.py shipped with before the page engine.
+    text = ""
+    with pdfplumber.open(pdf_file) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+    return text.strip()
+
+
+def engine_call(engine, data, workers):
+    if engine == "legacy":
+        return lambda: legacy_extract_text_from_pdf(io.BytesIO(data))
+    if engine == "serial":
+        return lambda: list(iter_pdf_pages(data, workers=1))
+    return lambda: list(iter_pdf_pages(data, workers=workers))
+
+
+def time_rounds(calls, rounds):
+    for fn in calls.values():
+        fn()
+    timings = {engine: [] for engine in calls}
+    order = list(calls)
+    for i in range(rounds):
+        for engine in order[i % len(order):] + order[:i % len(order)]:
+            start = time.perf_counter()
+            calls[engine]()
+            timings[engine].append(time.perf_counter() - start)
+    return {engine: statistics.median(values) for engine, values in timings.items()}
+
+
+def time_first_page(data):
+    start = time.perf_counter()
+    next(iter(iter_pdf_pages(data, workers=1)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--engine", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"CPUs available: {available_cpus()}")
+    compared = [engine for engine in args.engine if engine != "legacy"] if "legacy" in args.engine else []
+    header = "".join(f" {engine + ' s':>11}" for engine in args.engine)
+    header += "".join(f" {engine + '/legacy':>16}" for engine in compared)
+    print(f"{'pages':>6}{header} {'first page s':>13}")
+    for pages in args.sizes:
+        data = make_pdf(pages)
+        medians = time_rounds({engine: engine_call(engine, data, args.workers) for engine in args.engine}, args.rounds)
+        row = "".join(f" {medians[engine]:>11.3f}" for engine in args.engine)
+        row += "".join(f" {medians[engine] / medians['legacy']:>15.2f}x" for engine in compared)
+        print(f"{pages:>6}{row} {time_first_page(data):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
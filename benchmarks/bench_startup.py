@@ -0,0 +1,114 @@
+"""Measure import time and time to first render of the Streamlit app.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --repeat 3
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Import times come from ``python -X importtime``; the first render is timed
+with Streamlit's AppTest, which executes app.py once without a browser.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES = [
+    "streamlit",
+    "logic.answer_cache",
+    "logic.chat_history",
+    "logic.chunked_summary",
+    "logic.document_store",
+    "logic.jobs",
+    "logic.model_registry",
+    "logic.retrieval",
+    "logic.scheduler",
+    "logic.ui_components",
+    "logic.utils",
+    "logic.warmup",
+]
+
+FIRST_RENDER_SCRIPT = """
+import time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout={timeout})
+app.run()
+elapsed = time.perf_counter() - started
+if app.exception:
+    raise SystemExit(f"app.py raised: {{app.exception[0].message}}")
+print(elapsed)
+"""
+
+
+def import_times(module):
+    # Returns {module: cumulative microseconds} for everything the import pulled in.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def time_first_render(app, timeout):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER_SCRIPT.format(app=app, timeout=timeout)],
+        capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1]), wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    print(f"{'module':<28} {'import ms':>10}")
+    slowest = {}
+    for module in args.modules:
+        try:
+            times = import_times(module)
+        except RuntimeError as exc:
+            print(f"{module:<28} {'failed':>10}  {exc}")
+            continue
+        print(f"{module:<28} {times.get(module, 0) / 1000:>10.1f}")
+        for name, cumulative in times.items():
+            slowest[name] = max(slowest.get(name, 0), cumulative)
+
+    print("\nSlowest imports (cumulative ms):")
+    for name, cumulative in sorted(slowest.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<40} {cumulative / 1000:>8.1f}")
+
+    print(f"\nTime to first render of {args.app} ({args.repeat} cold runs):")
+    renders, walls = [], []
+    for _ in range(args.repeat):
+        try:
+            render, wall = time_first_render(args.app, args.timeout)
+        except RuntimeError as exc:
+            print(f"  failed: {exc}")
+            return
+        renders.append(render)
+        walls.append(wall)
+    print(f"  first render s   median {statistics.median(renders):.2f}  max {max(renders):.2f}")
+    print(f"  process wall s   median {statistics.median(walls):.2f}  max {max(walls):.2f}")
+
+
+if __name__ == "__main__":
+    main()
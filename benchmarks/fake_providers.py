@@ -0,0 +1,57 @@
+"""Resource providers that answer without the network.
+
+They exercise ResourceFetcher's fan-out, deadline and stale-cache fallback
+exactly as real providers would: one answers at once, one takes longer
+than any sensible deadline, and one fails until told otherwise.
+"""
+import threading
+from typing import Dict, List
+
+from logic.resources import ResourceProvider
+
+
+def _links(name: str, topic: str, limit: int) -> List[Dict]:
+    return [
+        {"title": f"{topic} ({name} {i + 1})", "url": f"https://example.invalid/{name}/{i}", "kind": "article"}
+        for i in range(limit)
+    ]
+
+
+class InstantProvider(ResourceProvider):
+    name = "instant"
+
+    def fetch(self, session, topic, limit, timeout):
+        return _links(self.name, topic, limit)
+
+
+class SlowProvider(ResourceProvider):
+    """Answers after `delay` seconds, or as soon as release() is called."""
+
+    name = "slow"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._released = threading.Event()
+
+    def release(self):
+        # Wakes the calls waiting now; later calls wait again.
+        released, self._released = self._released, threading.Event()
+        released.set()
+
+    def fetch(self, session, topic, limit, timeout):
+        self._released.wait(self.delay)
+        return _links(self.name, topic, limit)
+
+
+class FlakyProvider(ResourceProvider):
+    """Fails while `failing` is set, like a source that has gone offline."""
+
+    name = "flaky"
+
+    def __init__(self):
+        self.failing = False
+
+    def fetch(self, session, topic, limit, timeout):
+        if self.failing:
+            raise ConnectionError("source unreachable")
+        return _links(self.name, topic, limit)
@@ -0,0 +1,94 @@
+"""Requests per second through the inference scheduler at several session counts.
+
+Each simulated session sends one question at a time, as a Streamlit
+script thread does. The default stand-in model needs no downloads: a
+forward pass holds one shared "CPU" for a fixed overhead plus a per-item
+cost, which is how batched CPU inference behaves. Pass --real to load
+deepset/tinyroberta-squad2 through the model registry instead.
+
+    python -m benchmarks.load_test_scheduler --sessions 1 10 50
+"""
+import argparse
+import json
+import threading
+import time
+
+from logic.metrics import metrics
+from logic.scheduler import InferenceScheduler
+
+QUESTION = {
+    "question": "What do plants need for photosynthesis?",
+    "context": "Plants need light, water and carbon dioxide for photosynthesis. " * 8,
+}
+
+
+class StandInQA:
+    task = "question-answering"
+
+    def __init__(self, overhead_ms=25.0, per_item_ms=3.0):
+        self.overhead = overhead_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self._cpu = threading.Lock()
+
+    def __call__(self, inputs, batch_size=1, **kwargs):
+        items = inputs if isinstance(inputs, list) else [inputs]
+        with self._cpu:
+            time.sleep(self.overhead + self.per_item * len(items))
+        outputs = [{"answer": "light", "score": 0.9, "start": 0, "end": 5} for _ in items]
+        return outputs if isinstance(inputs, list) else outputs[0]
+
+
+def run_sessions(call, sessions, duration):
+    done = [0] * sessions
+    stop = time.perf_counter() + duration
+
+    def session(i):
+        while time.perf_counter() < stop:
+            call()
+            done[i] += 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--real", action="store_true", help="use tinyroberta-squad2 instead of the stand-in")
+    parser.add_argument("--metrics", action="store_true", help="print scheduler metrics after each run")
+    args = parser.parse_args()
+
+    if args.real:
+        from logic.model_registry import registry
+
+        model = registry.get("question-answering", "deepset/tinyroberta-squad2", device=-1)
+    else:
+        model = StandInQA()
+
+    print(f"{'sessions':>8} {'direct req/s':>13} {'batched req/s':>14} {'mean batch':>11} {'p95 latency ms':>15}")
+    for sessions in args.sessions:
+        direct = run_sessions(lambda: model(QUESTION), sessions, args.duration)
+
+        metrics.reset()
+        scheduler = InferenceScheduler(args.max_batch_size, args.max_wait_ms)
+        batched_model = scheduler.pipeline("qa", lambda: model, "question-answering")
+        batched = run_sessions(lambda: batched_model(QUESTION), sessions, args.duration)
+
+        snapshot = metrics.snapshot()["summaries"]
+        batch_size = snapshot["scheduler_batch_size"][0]["mean"]
+        p95 = snapshot["scheduler_request_seconds"][0]["p95"] * 1000
+        print(f"{sessions:>8} {direct:>13.1f} {batched:>14.1f} {batch_size:>11.1f} {p95:>15.1f}")
+        if args.metrics:
+            print(json.dumps(metrics.snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
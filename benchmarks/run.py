@@ -0,0 +1,459 @@
+"""Offline benchmark suite for the extraction, inference and history hot paths.
+
+Runs on a CPU-only machine with no network: PDFs and page images are
+generated, and tiny random-weight stand-ins (benchmarks/standin_models.py)
+replace the real models. Every case reports p50/p95 latency and throughput;
+results are written as JSON and compared against a stored baseline.
+
+    python -m benchmarks.run                                # every suite
+    python -m benchmarks.run --only pdf history --quick
+    python -m benchmarks.run --save-baseline                # record benchmarks/baseline.json
+    python -m benchmarks.run --threshold 0.25               # fail on >25% slower p50
+    python -m benchmarks.run --no-compare                   # just measure
+
+Each suite gets its own temporary database and document store, so a run
+never changes the app's data/ directory. Suites whose dependencies are
+missing (the tesseract binary, or torch and transformers for the model
+suites) are reported as skipped. The exit status is 1 when any case is
+slower than the baseline by more than the threshold, and 2 when there is
+no baseline to compare against and --no-compare was not given.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import WORDS, lorem, make_image, make_pdf
+from logic import db
+from logic.utils import available_cpus
+
+DEFAULT_OUTPUT = os.path.join("data", "benchmarks", "latest.json")
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+# Cases that take microseconds swing by more than any sensible threshold, so
+# a change also has to be at least this large in absolute terms.
+DEFAULT_MIN_DELTA_MS = 0.1
+
+
+class Skip(Exception):
+    pass
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[], object], repeat: int, items: int = 1,
+            setup: Optional[Callable[[], object]] = None, warmup: int = 1) -> Dict:
+    # setup() runs before every call and is not timed.
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    ordered = sorted(timings)
+    return {
+        "runs": repeat,
+        "items": items,
+        "p50_ms": percentile(ordered, 0.5) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "mean_ms": sum(ordered) / repeat * 1000,
+        "throughput_per_s": items * repeat / sum(ordered) if sum(ordered) else 0.0,
+    }
+
+
+def require(*modules: str):
+    for module in modules:
+        try:
+            __import__(module)
+        except ImportError as exc:
+            raise Skip(f"needs {module} ({exc})") from exc
+
+
+# --- Suites ---
+# Each suite yields (case id, result) pairs.
+
+def bench_pdf(quick: bool):
+    from logic.utils import extract_text_from_pdf
+
+    require("pdfplumber")
+    for pages in ([5, 20] if quick else [5, 50, 200]):
+        data = make_pdf(pages)
+        yield f"pdf.extract_text_from_pdf[pages={pages}]", measure(
+            lambda: extract_text_from_pdf(data), repeat=3 if quick else 5, items=pages
+        )
+
+
+def bench_image(quick: bool):
+    import io
+
+    from logic import ocr
+    from logic.utils import extract_text_from_image
+
+    require("PIL", "pytesseract")
+    if ocr.find_tesseract() is None:
+        raise Skip("needs the tesseract binary")
+    # A4 pages at 75, 150 and 300 DPI.
+    sizes = [(620, 877), (1240, 1754)] if quick else [(620, 877), (1240, 1754), (2480, 3508)]
+    for width, height in sizes:
+        data = make_image((width, height), font_size=max(12, width // 45))
+        yield f"image.extract_text_from_image[{width}x{height}]", measure(
+            lambda: extract_text_from_image(io.BytesIO(data)), repeat=3 if quick else 5, setup=ocr.clear_cache
+        )
+
+
+def _use_standins():
+    require("torch", "transformers", "tokenizers")
+    from benchmarks.standin_models import use_standin_models
+
+    use_standin_models()
+
+
+def bench_answer(quick: bool):
+    _use_standins()
+    from logic.assistant import SMART_SUGGESTIONS, answer_question, answer_suggestions
+
+    counter = itertools.count()
+    for words in ([0, 1000] if quick else [0, 1000, 10000]):
+        context = lorem(words, seed=words) if words else ""
+        label = f"context_words={words}"
+        # A new question every call misses the answer cache; a repeated one hits it.
+        yield f"answer.answer_question.cold[{label}]", measure(
+            lambda: answer_question(f"What is the main idea of chapter {next(counter)}?", context=context),
+            repeat=5 if quick else 10,
+        )
+        yield f"answer.answer_question.cached[{label}]", measure(
+            lambda: answer_question("What is the main idea?", context=context), repeat=20
+        )
+        if words:
+            # All suggestions in one pass; always recomputed, per-item time is per question.
+            yield f"answer.answer_suggestions[{label}]", measure(
+                lambda: answer_suggestions(context), repeat=3 if quick else 5, items=len(SMART_SUGGESTIONS)
+            )
+
+
+def bench_summarize(quick: bool):
+    _use_standins()
+    from logic.assistant import summarize_text
+
+    for words in ([300, 3000] if quick else [300, 3000, 20000]):
+        text = lorem(words, seed=words)
+        yield f"summarize.summarize_text[words={words}]", measure(
+            lambda: summarize_text(text), repeat=2 if quick else 3
+        )
+
+
+def bench_quiz(quick: bool):
+    _use_standins()
+    from logic.quiz import generate_quiz
+
+    counter = itertools.count()
+    context = lorem(3000, seed=3000)
+    for n in ([5, 20] if quick else [5, 10, 20]):
+        # A new topic every call misses the quiz cache; items are questions.
+        yield f"quiz.generate_quiz.cold[n={n}]", measure(
+            lambda: generate_quiz(f"topic {next(counter)}", n=n), repeat=2 if quick else 3, items=n
+        )
+        yield f"quiz.generate_quiz.document[n={n}]", measure(
+            lambda: generate_quiz(f"topic {next(counter)}", n=n, context=context), repeat=2 if quick else 3, items=n
+        )
+    yield "quiz.generate_quiz.cached[n=20]", measure(lambda: generate_quiz("photosynthesis", n=20), repeat=20)
+
+
+def _seed_history(size: int):
+    now = datetime.now()
+    rows = []
+    for i in range(size):
+        question = lorem(12, seed=i)
+        created = (now - timedelta(minutes=37 * i)).isoformat()
+        rows.append((
+            str(uuid.uuid4()), f"Basic - {question[:25]}", question, lorem(80, seed=size + i),
+            int(i % 50 == 0), created, created,
+        ))
+    db.write_many(
+        "INSERT INTO chats (id, title, question, answer, pinned, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return [row[0] for row in rows]
+
+
+def _new_chat():
+    return {"title": "Basic - photosynthesis", "question": lorem(12), "answer": lorem(80), "pinned": False}
+
+
+def bench_history(quick: bool):
+    from logic.chat_history import ChatHistory
+
+    workdir = tempfile.mkdtemp(prefix="edumate-bench-")
+    repeat = 20 if quick else 50
+    for size in ([100, 1000] if quick else [100, 1000, 10000]):
+        db.DB_PATH = os.path.join(workdir, f"history-{size}.db")
+        ChatHistory.init_db()
+        ids = _seed_history(size)
+        some_id = ids[len(ids) // 2]
+        middle_page = ChatHistory.list_chats(limit=len(ids) // 2)
+        with db.connection() as conn:
+            row = conn.execute("SELECT * FROM chats WHERE id = ?", (some_id,)).fetchone()
+        pending = []
+
+        def save_pending():
+            chat = _new_chat()
+            ChatHistory.save_chat(chat)
+            pending.append(chat["id"])
+
+        cases = {
+            "init_db": (ChatHistory.init_db, None, repeat),
+            "save_chat": (lambda: ChatHistory.save_chat(_new_chat()), None, repeat),
+            "load_history": (ChatHistory.load_history, None, 5),
+            "list_chats.first": (ChatHistory.list_chats, None, repeat),
+            "list_chats.middle": (
+                lambda: ChatHistory.list_chats(after=ChatHistory.page_cursor(middle_page)), None, repeat
+            ),
+            "count_chats": (ChatHistory.count_chats, None, repeat),
+            "page_cursor": (lambda: ChatHistory.page_cursor(middle_page), None, repeat),
+            "fts_query": (lambda: ChatHistory.fts_query('"cell energy" photo'), None, repeat),
+            "search_chats.common": (lambda: ChatHistory.search_chats(WORDS[0]), None, repeat),
+            "search_chats.phrase": (lambda: ChatHistory.search_chats(f'"{lorem(3, seed=7)}"'), None, repeat),
+            "get_chat": (lambda: ChatHistory.get_chat(some_id), None, repeat),
+            "update_title": (lambda: ChatHistory.update_title(some_id, "Renamed"), None, repeat),
+            "update_chat": (lambda: ChatHistory.update_chat(some_id, answer=lorem(80, seed=1)), None, repeat),
+            "toggle_pin": (lambda: ChatHistory.toggle_pin(some_id), None, repeat),
+            "delete_chat": (lambda: ChatHistory.delete_chat(pending.pop()), save_pending, repeat),
+            "dict_from_row": (lambda: ChatHistory.dict_from_row(row), None, repeat),
+        }
+        for method, (fn, setup, runs) in cases.items():
+            yield f"history.{method}[chats={size}]", measure(fn, repeat=runs, setup=setup)
+
+
+def _seed_progress(size: int):
+    from logic import progress
+
+    today = datetime.now()
+    attempts, days, topics = [], [], []
+    for i in range(size):
+        created = today - timedelta(hours=7 * i)
+        topic = f"topic {i % 40}"
+        attempts.append((str(uuid.uuid4()), topic, "Basic", 10, i % 11, created.isoformat()))
+        days.append((created.date().isoformat(), 1, 10, i % 11, i % 3 == 0))
+        topics.append((topic, 10, i % 11, created.isoformat()))
+    db.write_many(progress.INSERT_ATTEMPT_SQL, attempts)
+    db.write_many(progress.BUMP_DAY_SQL, days)
+    db.write_many(progress.BUMP_TOPIC_SQL, topics)
+    db.write_many(progress.BUMP_TOTALS_SQL, [(10, i % 11) for i in range(size)])
+
+
+def bench_progress(quick: bool):
+    from logic import progress
+
+    workdir = tempfile.mkdtemp(prefix="edumate-bench-")
+    repeat = 20 if quick else 50
+    questions = [lorem(12, seed=i) for i in range(10)]
+    for size in ([100, 1000] if quick else [100, 1000, 10000]):
+        db.DB_PATH = os.path.join(workdir, f"progress-{size}.db")
+        progress.init_progress()
+        _seed_progress(size)
+        # Should stay flat as attempts grow: the dashboard reads rollups only.
+        yield f"progress.dashboard_stats[attempts={size}]", measure(progress.dashboard_stats, repeat=repeat)
+        yield f"progress.record_quiz_attempt[attempts={size}]", measure(
+            lambda: progress.record_quiz_attempt("photosynthesis", "Basic", questions, [0] * 10, [0, 1] * 5),
+            repeat=repeat, items=10,
+        )
+
+
+def _expect(result: Dict, errors: set, stale: set):
+    # The suite also checks behaviour: timing a fetch that silently
+    # dropped a provider would measure the wrong thing.
+    if set(result["errors"]) != errors or set(result["stale"]) != stale:
+        raise RuntimeError(f"unexpected fetch result: errors={result['errors']} stale={result['stale']}")
+
+
+def bench_resources(quick: bool):
+    from benchmarks.fake_providers import FlakyProvider, InstantProvider, SlowProvider
+    from logic.resources import ResourceFetcher
+
+    cache_dir = os.path.join(tempfile.mkdtemp(prefix="edumate-bench-"), "resources")
+    repeat = 10 if quick else 30
+    deadline = 0.05
+    counter = itertools.count()
+    slow, flaky = SlowProvider(delay=20 * deadline), FlakyProvider()
+
+    def fetcher(providers, ttl_seconds):
+        return ResourceFetcher(
+            providers, cache_dir=cache_dir, ttl_seconds=ttl_seconds, deadline=deadline, session_factory=lambda: None
+        )
+
+    # A provider that misses the deadline is reported, and the rest still answer.
+    racing = fetcher([InstantProvider(), slow], ttl_seconds=0)
+
+    def fetch_past_deadline():
+        result = racing.fetch(f"topic {next(counter)}")
+        slow.release()
+        _expect(result, errors={"slow"}, stale=set())
+
+    result = measure(fetch_past_deadline, repeat=repeat)
+    if result["p95_ms"] > (deadline + 0.5) * 1000:
+        raise RuntimeError(f"fetch took {result['p95_ms']:.0f} ms with a {deadline:g}s deadline")
+    yield "resources.fetch.deadline", result
+
+    # A failing provider falls back to its last saved results, however old.
+    offline = fetcher([InstantProvider(), flaky], ttl_seconds=0)
+    offline.fetch("photosynthesis")
+    flaky.failing = True
+    yield "resources.fetch.stale", measure(
+        lambda: _expect(offline.fetch("photosynthesis"), errors={"flaky"}, stale={"flaky"}), repeat=repeat
+    )
+
+    cached = fetcher([InstantProvider(), flaky], ttl_seconds=3600)
+    yield "resources.fetch.cached", measure(
+        lambda: _expect(cached.fetch("photosynthesis"), errors=set(), stale=set()), repeat=repeat
+    )
+
+
+SUITES = {
+    "pdf": bench_pdf,
+    "image": bench_image,
+    "answer": bench_answer,
+    "summarize": bench_summarize,
+    "quiz": bench_quiz,
+    "history": bench_history,
+    "progress": bench_progress,
+    "resources": bench_resources,
+}
+
+
+# --- Reporting ---
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> Dict:
+    comparison = {}
+    for case, result in results.items():
+        before = baseline.get(case)
+        if not before or not before.get("p50_ms"):
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"]
+        if abs(result["p50_ms"] - before["p50_ms"]) < min_delta_ms:
+            status = "same"
+        else:
+            status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        comparison[case] = {"baseline_p50_ms": before["p50_ms"], "ratio": ratio, "status": status}
+    return comparison
+
+
+def print_report(results: Dict, comparison: Dict):
+    print(f"{'case':<58} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>10} {'vs base':>9}")
+    for case, result in results.items():
+        change = comparison.get(case)
+        marker = ""
+        if change:
+            marker = f"{(change['ratio'] - 1) * 100:+.0f}%" + (" !" if change["status"] == "slower" else "")
+        print(
+            f"{case:<58} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+            f"{result['throughput_per_s']:>10.1f} {marker:>9}"
+        )
+
+
+def isolate_storage(workdir: str):
+    # Suites must never touch data/history.db or data/documents, and each
+    # one starts from empty caches.
+    from logic.answer_cache import answer_cache
+    from logic.document_store import document_store
+
+    os.makedirs(workdir, exist_ok=True)
+    db.DB_PATH = os.path.join(workdir, "history.db")
+    document_store.root = os.path.join(workdir, "documents")
+    document_store.clear_memory()
+    answer_cache.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), help="suites to run (default: all)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer runs")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--no-compare", action="store_true", help="measure without comparing to a baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative p50 slowdown reported as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore p50 changes smaller than this")
+    args = parser.parse_args()
+    # Baselines are machine-specific, so none is committed; a run that
+    # expects one must not pass silently without it.
+    if not (args.save_baseline or args.no_compare or os.path.exists(args.baseline)):
+        parser.exit(2, f"No baseline at {args.baseline}. Record one on this machine with --save-baseline, "
+                       "or pass --no-compare to only measure.\n")
+
+    results, skipped = {}, {}
+    workdir = tempfile.mkdtemp(prefix="edumate-bench-")
+    for name in args.only or SUITES:
+        print(f"# {name}", flush=True)
+        isolate_storage(os.path.join(workdir, name))
+        try:
+            for case, result in SUITES[name](args.quick):
+                results[case] = result
+                print(f"  {case}: p50 {result['p50_ms']:.2f} ms", flush=True)
+        except Skip as exc:
+            skipped[name] = str(exc)
+            print(f"  skipped: {exc}", flush=True)
+
+    baseline = {}
+    if not (args.save_baseline or args.no_compare):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    comparison = compare(results, baseline, args.threshold, args.min_delta_ms)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpus": available_cpus(),
+            "quick": args.quick,
+        },
+        "results": results,
+        "skipped": skipped,
+        "comparison": comparison,
+    }
+    for path in [args.output] + ([args.baseline] if args.save_baseline else []):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print()
+    print_report(results, comparison)
+    regressions = [case for case, change in comparison.items() if change["status"] == "slower"]
+    print(f"\nWrote {args.output}" + (f" and {args.baseline}" if args.save_baseline else ""))
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}:")
+        for case in regressions:
+            print(f"  {case}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
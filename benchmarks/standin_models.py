@@ -0,0 +1,115 @@
+"""Tiny random-weight models that stand in for the app's real ones.
+
+They keep the real pipelines' tasks and code paths (tokenizer, windowing,
+generate) but are built locally from a byte-level BPE tokenizer trained on
+the synthetic corpus, so benchmarks need no downloads. Their outputs are
+meaningless; only their cost matters, and that only relative to earlier
+runs on the same machine.
+"""
+import os
+from typing import Dict, Tuple
+
+from benchmarks.synthetic import lorem
+
+STANDIN_DIR = os.path.join("data", "benchmarks", "models")
+VOCAB_SIZE = 1000
+MAX_POSITIONS = 512
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+HIDDEN_SIZE = 64
+LAYERS = 2
+HEADS = 2
+FFN_SIZE = 256
+
+
+def _train_tokenizer(path: str):
+    from tokenizers import ByteLevelBPETokenizer
+
+    tokenizer = ByteLevelBPETokenizer()
+    corpus = (lorem(200, seed=i) for i in range(200))
+    tokenizer.train_from_iterator(
+        corpus, vocab_size=VOCAB_SIZE, min_frequency=1, special_tokens=SPECIAL_TOKENS, show_progress=False
+    )
+    os.makedirs(path, exist_ok=True)
+    tokenizer.save_model(path)
+
+
+def _tokenizer(tokenizer_class, root: str):
+    tokenizer_dir = os.path.join(root, "tokenizer")
+    if not os.path.exists(os.path.join(tokenizer_dir, "merges.txt")):
+        _train_tokenizer(tokenizer_dir)
+    return tokenizer_class(
+        vocab_file=os.path.join(tokenizer_dir, "vocab.json"),
+        merges_file=os.path.join(tokenizer_dir, "merges.txt"),
+        model_max_length=MAX_POSITIONS,
+    )
+
+
+def _build_qa_model(root: str, path: str):
+    import torch
+    from transformers import RobertaConfig, RobertaForQuestionAnswering, RobertaTokenizerFast
+
+    tokenizer = _tokenizer(RobertaTokenizerFast, root)
+    torch.manual_seed(0)
+    config = RobertaConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=HIDDEN_SIZE,
+        num_hidden_layers=LAYERS,
+        num_attention_heads=HEADS,
+        intermediate_size=FFN_SIZE,
+        # RoBERTa positions start after the padding index.
+        max_position_embeddings=MAX_POSITIONS + 2,
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    RobertaForQuestionAnswering(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def _build_seq2seq_model(root: str, path: str):
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
+
+    tokenizer = _tokenizer(BartTokenizerFast, root)
+    torch.manual_seed(0)
+    config = BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=HIDDEN_SIZE,
+        encoder_layers=LAYERS,
+        decoder_layers=LAYERS,
+        encoder_attention_heads=HEADS,
+        decoder_attention_heads=HEADS,
+        encoder_ffn_dim=FFN_SIZE,
+        decoder_ffn_dim=FFN_SIZE,
+        max_position_embeddings=MAX_POSITIONS,
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+        forced_eos_token_id=tokenizer.eos_token_id,
+    )
+    BartForConditionalGeneration(config).save_pretrained(path)
+    tokenizer.save_pretrained(path)
+
+
+def standin_models(root: str = STANDIN_DIR) -> Dict[str, Tuple[str, str]]:
+    """Builds the stand-ins once and returns them keyed like assistant.SESSION_MODELS."""
+    qa_path = os.path.join(root, "qa")
+    seq2seq_path = os.path.join(root, "seq2seq")
+    if not os.path.exists(os.path.join(qa_path, "config.json")):
+        _build_qa_model(root, qa_path)
+    if not os.path.exists(os.path.join(seq2seq_path, "config.json")):
+        _build_seq2seq_model(root, seq2seq_path)
+    return {
+        "qa_pipeline": ("question-answering", qa_path),
+        "summarizer": ("summarization", seq2seq_path),
+        "general_qa": ("text2text-generation", seq2seq_path),
+    }
+
+
+def use_standin_models(root: str = STANDIN_DIR):
+    # Must run before the first get_model() call: the scheduler keeps the
+    # pipeline getter it was first given for each model name.
+    from logic import assistant
+
+    assistant.SESSION_MODELS.update(standin_models(root))
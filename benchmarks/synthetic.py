@@ -0,0 +1,75 @@
+import io
+import random
+from typing import List, Tuple
+
+WORDS = (
+    "cell energy photosynthesis equation algebra history empire revolution "
+    "molecule reaction student lesson chapter theory evidence climate river "
+    "mountain economy market trade language grammar poem author number "
+    "function graph variable experiment result conclusion method sample"
+).split()
+
+
+def lorem(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, words_per_line: int = 12, seed: int = 0) -> bytes:
+    # A minimal single-font PDF, enough for pdfplumber to extract real text
+    # without needing reportlab or any other writer.
+    objects: List[bytes] = []
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        lines = [lorem(words_per_line, seed=seed * 100_000 + i * 1000 + j) for j in range(lines_per_page)]
+        stream = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in lines:
+            stream.append(f"({_escape_pdf_text(line)}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {page_ids[i] + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+def make_image(size: Tuple[int, int] = (1240, 1754), font_size: int = 28, seed: int = 0) -> bytes:
+    # A scanned-looking page of dark text on an off-white background, as PNG.
+    from PIL import Image, ImageDraw, ImageFont
+
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError:
+        # Pillow < 10.1 only has the small bitmap font.
+        font = ImageFont.load_default()
+    image = Image.new("L", size, color=235)
+    draw = ImageDraw.Draw(image)
+    margin, line_height = size[0] // 12, int(font_size * 1.5)
+    words_per_line = max(1, (size[0] - 2 * margin) // (font_size * 5))
+    for i, y in enumerate(range(margin, size[1] - margin, line_height)):
+        draw.text((margin, y), lorem(words_per_line, seed=seed * 100_000 + i), fill=20, font=font)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from logic import db
+from logic.metrics import metrics
+
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("EDUMATE_ANSWER_CACHE_ENTRIES", "2048"))
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("EDUMATE_ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+
+SELECT_ANSWER_SQL = "SELECT value, expires_at FROM answer_cache WHERE key = ?"
+UPSERT_ANSWER_SQL = """
+    INSERT INTO answer_cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+        created_at = excluded.created_at, expires_at = excluded.expires_at
+"""
+DELETE_EXPIRED_SQL = "DELETE FROM answer_cache WHERE expires_at < ?"
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    return WHITESPACE_RE.sub(" ", question).strip().lower().rstrip("?!. ")
+
+
+def cache_key(question: str, level_prompt: str, model_id: str, context_hash: str = "") -> str:
+    payload = json.dumps([normalize_question(question), level_prompt, model_id, context_hash])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Inference results shared by every session: an in-process LRU backed by SQLite."""
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_MAX_ENTRIES, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_ready = False
+
+    def init_db(self):
+        with db.connection() as conn:
+            conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS answer_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_answer_expires ON answer_cache(expires_at)")
+        db.write(DELETE_EXPIRED_SQL, (time.time(),))
+        self._db_ready = True
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    metrics.cache_lookup("answer", True, tier="memory")
+                    return entry[0]
+                del self._memory[key]
+        if not self._db_ready:
+            self.init_db()
+        with db.connection() as conn:
+            row = conn.execute(SELECT_ANSWER_SQL, (key,)).fetchone()
+        if row is None or row[1] <= now:
+            metrics.cache_lookup("answer", False)
+            return None
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        metrics.cache_lookup("answer", True, tier="sqlite")
+        return value
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if not self._db_ready:
+            self.init_db()
+        db.write(UPSERT_ANSWER_SQL, (key, json.dumps(value), now, expires_at))
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def reset(self):
+        """Forgets cached answers in memory and re-creates the table on next use, e.g. after db.DB_PATH changes."""
+        self.clear_memory()
+        self._db_ready = False
+
+    def _remember(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+
+answer_cache = AnswerCache()
@@ -0,0 +1,147 @@
+import uuid
+
+from logic.answer_cache import answer_cache, cache_key
+from logic.backends import backend_for
+from logic.batch_qa import answer_questions
+from logic.chat_history import ChatHistory
+from logic.chunked_summary import summarize_long_text
+from logic.document_store import content_hash, document_store
+from logic.metrics import metrics
+from logic.model_registry import registry
+from logic.retrieval import TOP_K, get_index
+from logic.scheduler import scheduler
+from logic.streaming import stream_generate
+
+# The models behind the assistant, used by the app and by offline tools alike.
+# Pipelines live in the process-wide registry; callers only hold references.
+SESSION_MODELS = {
+    "qa_pipeline": ("question-answering", "deepset/tinyroberta-squad2"),
+    "summarizer": ("summarization", "t5-small"),
+    "general_qa": ("text2text-generation", "google/flan-t5-small"),
+}
+MODEL_DEVICE = -1
+NO_PASSAGE_ANSWER = "The document has no passage that answers this."
+
+# Offered for every uploaded document and answered ahead of the first click.
+SMART_SUGGESTIONS = [
+    "What is the main idea of the text?",
+    "Summarize in 3 key points",
+    "What is the tone or mood?",
+    "Who is the audience?"
+]
+
+
+def get_model(name):
+    # Calls from every session are queued per model and run in shared batches.
+    task, model = SESSION_MODELS[name]
+    return scheduler.pipeline(name, lambda: registry.get(task, model, device=MODEL_DEVICE), task)
+
+
+# --- Prompt Logic ---
+def get_context_prompt(level):
+    return {
+        "Basic": "Explain simply like to a 10-year-old: ",
+        "SHS": "Explain for high school level: ",
+        "Tertiary": "Provide detailed academic explanation: "
+    }.get(level, "")
+
+# --- Answer ---
+def answer_key(question, context="", level="Basic", doc_hash=None):
+    if context:
+        doc_hash = doc_hash or content_hash(context.encode("utf-8"))
+    model_name = "qa_pipeline" if context else "general_qa"
+    model = SESSION_MODELS[model_name][1]
+    model_id = f"{model}@{backend_for(model)}"
+    return cache_key(question, get_context_prompt(level), model_id, doc_hash or "")
+
+
+def answer_question(question, context="", level="Basic", doc_hash=None):
+    if context:
+        doc_hash = doc_hash or content_hash(context.encode("utf-8"))
+    key = answer_key(question, context, level, doc_hash)
+    with metrics.span("answer", source="document" if context else "general"):
+        answer, _ = answer_cache.get_or_compute(
+            key, lambda: run_question(question, context, level, doc_hash)
+        )
+    return answer
+
+
+def run_question(question, context, level, doc_hash):
+    prompt = get_context_prompt(level) + question
+    if not context:
+        # Without a document there is nothing to extract an answer from.
+        result = get_model("general_qa")(prompt, max_length=256)
+        return result[0]["generated_text"]
+    passages = get_index(context, doc_hash).top_chunks(question, k=TOP_K)
+    if not passages:
+        return NO_PASSAGE_ANSWER
+    results = get_model("qa_pipeline")(
+        [{"question": prompt, "context": passage} for passage in passages],
+        max_length=512
+    )
+    return max(results, key=lambda r: r["score"])["answer"]
+
+
+def answer_suggestions(text, level="Basic", doc_hash=None, questions=SMART_SUGGESTIONS, progress=None):
+    """Answers several questions about one document in a single batched pass.
+
+    Passages retrieved for any of the questions are tokenized once and
+    scored against all of them. Answers also go into the answer cache, so
+    asking one of the questions later does not run the model again.
+    """
+    doc_hash = doc_hash or content_hash(text.encode("utf-8"))
+    index = get_index(text, doc_hash)
+    passages = list(dict.fromkeys(p for q in questions for p in index.top_chunks(q, k=TOP_K)))
+    prompt = get_context_prompt(level)
+    with metrics.span("answer_suggestions"):
+        results = answer_questions(
+            get_model("qa_pipeline"), [prompt + q for q in questions], passages, progress=progress
+        )
+    answers = {}
+    for question, result in zip(questions, results):
+        answers[question] = result["answer"]
+        answer_cache.put(answer_key(question, text, level, doc_hash), result["answer"])
+    return answers
+
+
+def stream_answer(question, level="Basic"):
+    # General questions are generated token by token; the caller caches the
+    # full answer once the stream is done.
+    return stream_generate(
+        get_model("general_qa"),
+        get_context_prompt(level) + question,
+        model_name=SESSION_MODELS["general_qa"][1],
+        max_length=256,
+    )
+
+
+# --- Summarize ---
+def summarize_text(text, level="Basic", progress=None):
+    return summarize_long_text(
+        get_model("summarizer"),
+        text,
+        max_length=130 if level == "Basic" else 200,
+        min_length=30,
+        prefix="summarize: ",
+        progress=progress
+    )
+
+
+def save_summary(doc_hash, level, summary, title=None):
+    """Stores a document summary and its chat once; returns (chat id, whether the chat is new)."""
+    document_store.put_artifact(doc_hash, f"summary:{level}", summary)
+    # Prevent duplicate summary chats
+    chat_key = f"summary_chat:{level}"
+    summary_chat_id = document_store.get_artifact(doc_hash, chat_key)
+    if summary_chat_id and ChatHistory.get_chat(summary_chat_id):
+        return summary_chat_id, False
+    chat = {
+        "id": str(uuid.uuid4()),
+        "title": title or f"Summary ({level})",
+        "question": f"Summarize this document ({level})",
+        "answer": summary,
+        "pinned": False
+    }
+    ChatHistory.save_chat(chat)
+    document_store.put_artifact(doc_hash, chat_key, chat["id"])
+    return chat["id"], True
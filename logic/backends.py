@@ -0,0 +1,104 @@
+import os
+from typing import Dict
+
+# "torch" (fp32 weights), "int8" (dynamically quantized Linear layers) or
+# "onnx" (an exported ONNX Runtime graph, cached under ONNX_EXPORT_DIR).
+BACKENDS = ("torch", "int8", "onnx")
+INFERENCE_BACKEND = os.environ.get("EDUMATE_INFERENCE_BACKEND", "torch")
+# Per-model overrides, e.g. "t5-small=onnx,deepset/tinyroberta-squad2=int8".
+MODEL_BACKENDS_SPEC = os.environ.get("EDUMATE_MODEL_BACKENDS", "")
+ONNX_EXPORT_DIR = "data/onnx"
+
+ORT_MODEL_CLASSES = {
+    "question-answering": "ORTModelForQuestionAnswering",
+    "summarization": "ORTModelForSeq2SeqLM",
+    "text2text-generation": "ORTModelForSeq2SeqLM",
+}
+
+
+def parse_model_backends(spec: str) -> Dict[str, str]:
+    backends = {}
+    for entry in spec.split(","):
+        if "=" not in entry:
+            continue
+        model, backend = (part.strip() for part in entry.rsplit("=", 1))
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend {backend!r} for {model}; expected one of {BACKENDS}")
+        backends[model] = backend
+    return backends
+
+
+MODEL_BACKENDS = parse_model_backends(MODEL_BACKENDS_SPEC)
+
+
+def backend_for(model: str) -> str:
+    return MODEL_BACKENDS.get(model, INFERENCE_BACKEND)
+
+
+def onnx_export_dir(model: str) -> str:
+    return os.path.join(ONNX_EXPORT_DIR, model.replace("/", "--"))
+
+
+def load_pipeline(task: str, model: str, backend: str = "torch", **kwargs):
+    from transformers import pipeline
+
+    if backend == "torch":
+        return pipeline(task, model=model, **kwargs)
+    if backend == "int8":
+        import torch
+
+        pipe = pipeline(task, model=model, **kwargs)
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+    if backend == "onnx":
+        return _load_onnx_pipeline(task, model, **kwargs)
+    raise ValueError(f"Unknown inference backend {backend!r}; expected one of {BACKENDS}")
+
+
+def _load_onnx_pipeline(task: str, model: str, **kwargs):
+    try:
+        import optimum.onnxruntime as ort
+    except ImportError as exc:
+        raise ImportError(
+            "The onnx backend needs optimum[onnxruntime]: pip install 'optimum[onnxruntime]'"
+        ) from exc
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = getattr(ort, ORT_MODEL_CLASSES[task])
+    export_dir = onnx_export_dir(model)
+    if os.path.exists(os.path.join(export_dir, "config.json")):
+        ort_model = model_class.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        # Export once; later loads read the cached graph from disk.
+        ort_model = model_class.from_pretrained(model, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        ort_model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+    kwargs.pop("device", None)
+    return pipeline(task, model=ort_model, tokenizer=tokenizer, **kwargs)
+
+
+def _tensor_bytes(value) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v) for v in value)
+    if hasattr(value, "numel") and hasattr(value, "element_size"):
+        return value.numel() * value.element_size()
+    return 0
+
+
+def model_size_bytes(pipe) -> int:
+    model = getattr(pipe, "model", None)
+    if model is None:
+        return 0
+    if hasattr(model, "state_dict"):
+        # state_dict also covers the packed weights of quantized layers.
+        return sum(_tensor_bytes(v) for v in model.state_dict().values())
+    save_dir = getattr(model, "model_save_dir", None)
+    if save_dir and os.path.isdir(save_dir):
+        return sum(
+            os.path.getsize(os.path.join(save_dir, name))
+            for name in os.listdir(save_dir)
+            if name.endswith((".onnx", ".onnx_data"))
+        )
+    return 0
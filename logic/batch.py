@@ -0,0 +1,208 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from logic import db
+
+PDF_EXTENSIONS = (".pdf",)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+LEVELS = ("Basic", "SHS", "Tertiary")
+
+UPSERT_MANIFEST_SQL = """
+    INSERT INTO batch_manifest (doc_hash, level, path, status, chat_id, error, seconds, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(doc_hash, level) DO UPDATE SET
+        path = excluded.path, status = excluded.status, chat_id = excluded.chat_id,
+        error = excluded.error, seconds = excluded.seconds, updated_at = excluded.updated_at
+"""
+SELECT_DONE_SQL = "SELECT doc_hash, level FROM batch_manifest WHERE status = 'done'"
+
+_worker_torch_threads = 0
+
+
+def init_manifest():
+    with db.connection() as conn:
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS batch_manifest (
+            doc_hash TEXT NOT NULL,
+            level TEXT NOT NULL,
+            path TEXT NOT NULL,
+            status TEXT NOT NULL,
+            chat_id TEXT,
+            error TEXT,
+            seconds REAL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (doc_hash, level)
+        )
+        """
+        )
+
+
+def completed() -> Set[Tuple[str, str]]:
+    with db.connection() as conn:
+        return set(conn.execute(SELECT_DONE_SQL).fetchall())
+
+
+def find_documents(root: str) -> List[str]:
+    extensions = PDF_EXTENSIONS + IMAGE_EXTENSIONS
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(extensions) and not name.startswith("."):
+                found.append(os.path.join(directory, name))
+    # Largest first, so one big textbook does not start last and hold up the batch.
+    return sorted(found, key=lambda path: (-os.path.getsize(path), path))
+
+
+def _init_worker(db_path: str, documents_dir: str, torch_threads: int):
+    global _worker_torch_threads
+    from logic.document_store import document_store
+
+    # Workers are spawned, so module state such as the DB path starts fresh.
+    db.DB_PATH = db_path
+    document_store.root = documents_dir
+    _worker_torch_threads = torch_threads
+
+
+def load_document(path: str, data: bytes) -> Dict:
+    from logic.document_store import document_store
+    from logic.utils import extract_text_from_image, iter_pdf_pages
+
+    if path.lower().endswith(PDF_EXTENSIONS):
+        # The batch already uses every core, so pages are read in-process.
+        return document_store.get_or_extract(data, "pdf", lambda d: [p.text for p in iter_pdf_pages(d, workers=1)])
+    return document_store.get_or_extract(data, "image", lambda d: [extract_text_from_image(io.BytesIO(d))])
+
+
+def summarize_file(path: str, levels: Sequence[str]) -> Dict:
+    """Runs in a worker: extracts one file and stores a summary per level."""
+    global _worker_torch_threads
+    if _worker_torch_threads:
+        import torch
+
+        # Several workers share the machine; one torch pool each would oversubscribe it.
+        torch.set_num_threads(_worker_torch_threads)
+        _worker_torch_threads = 0
+
+    from logic.assistant import save_summary, summarize_text
+    from logic.document_store import document_store
+
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        doc = load_document(path, f.read())
+    results = []
+    for level in levels:
+        level_started = time.perf_counter()
+        try:
+            if not doc["text"].strip():
+                raise ValueError("No text could be extracted")
+            summary = document_store.get_artifact(doc["hash"], f"summary:{level}")
+            if summary is None:
+                summary = summarize_text(doc["text"], level)
+            chat_id, _ = save_summary(doc["hash"], level, summary, title=f"Summary ({level}) - {os.path.basename(path)}")
+            results.append({"level": level, "status": "done", "chat_id": chat_id, "error": None,
+                            "seconds": time.perf_counter() - level_started})
+        except Exception as exc:
+            results.append({"level": level, "status": "failed", "chat_id": None, "error": str(exc),
+                            "seconds": time.perf_counter() - level_started})
+    return {"path": path, "doc_hash": doc["hash"], "pages": len(doc["page_offsets"]),
+            "seconds": time.perf_counter() - started, "levels": results}
+
+
+def _record(path: str, doc_hash: str, level_results: List[Dict]):
+    now = datetime.now().isoformat()
+    db.write_many(
+        UPSERT_MANIFEST_SQL,
+        [
+            (doc_hash, r["level"], path, r["status"], r["chat_id"], r["error"], r["seconds"], now)
+            for r in level_results
+        ],
+    )
+
+
+def plan(paths: Sequence[str], levels: Sequence[str]) -> Iterator[Tuple[str, List[str]]]:
+    # Resume: levels already summarized in an earlier run are left out, and a
+    # file copied into two folders is only processed once.
+    from logic.document_store import content_hash
+
+    done = completed()
+    seen = set()
+    for path in paths:
+        with open(path, "rb") as f:
+            doc_hash = content_hash(f.read())
+        if doc_hash in seen:
+            continue
+        seen.add(doc_hash)
+        missing = [level for level in levels if (doc_hash, level) not in done]
+        if missing:
+            yield path, missing
+
+
+def run_batch(
+    root: str,
+    levels: Sequence[str] = ("Basic",),
+    workers: Optional[int] = None,
+    report: Callable[[str], None] = print,
+) -> Dict:
+    from logic.chat_history import ChatHistory
+    from logic.document_store import document_store
+    from logic.utils import available_cpus
+
+    ChatHistory.init_db()
+    init_manifest()
+    paths = find_documents(root)
+    todo = list(plan(paths, levels))
+    cpus = available_cpus()
+    workers = max(1, min(workers or cpus, len(todo) or 1))
+    report(f"{len(paths)} file(s) found, {len(todo)} to summarize with {workers} worker(s)")
+
+    started = time.perf_counter()
+    done_files = failed_files = 0
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(os.path.abspath(db.DB_PATH), os.path.abspath(document_store.root), max(1, cpus // workers)),
+    ) as pool:
+        futures = {pool.submit(summarize_file, path, missing): (path, missing) for path, missing in todo}
+        for future in as_completed(futures):
+            path, _ = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failed_files += 1
+                report(f"[{done_files + failed_files}/{len(todo)}] FAILED {path}: {exc}")
+                continue
+            _record(path, result["doc_hash"], result["levels"])
+            errors = [r for r in result["levels"] if r["status"] == "failed"]
+            if errors:
+                failed_files += 1
+            else:
+                done_files += 1
+            elapsed = time.perf_counter() - started
+            rate = (done_files + failed_files) / elapsed * 60
+            status = "; ".join(f"{r['level']}: {r['error']}" for r in errors) or "ok"
+            report(
+                f"[{done_files + failed_files}/{len(todo)}] {path} ({result['pages']} page(s), "
+                f"{result['seconds']:.1f}s) {status} - {rate:.1f} files/min"
+            )
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "files_found": len(paths),
+        "files_processed": done_files + failed_files,
+        "files_failed": failed_files,
+        "seconds": elapsed,
+        "files_per_minute": (done_files + failed_files) / elapsed * 60 if elapsed and todo else 0.0,
+    }
+    report(
+        f"Done: {summary['files_processed']} file(s) in {elapsed:.1f}s "
+        f"({summary['files_per_minute']:.1f} files/min), {failed_files} failed"
+    )
+    return summary
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+from logic.metrics import metrics
+
+QA_MAX_LENGTH = 384
+QA_STRIDE = 128
+QA_BATCH_SIZE = 16
+MAX_ANSWER_TOKENS = 30
+TOP_SPANS = 20
+
+
+def _windows(length: int, size: int, stride: int) -> List[int]:
+    # Start offsets of overlapping windows covering `length` tokens.
+    if length <= size:
+        return [0]
+    step = max(1, size - stride)
+    starts = list(range(0, length - size, step))
+    return starts + [length - size]
+
+
+def _best_span(start_probs, end_probs, first: int, last: int, max_answer_tokens: int):
+    # Highest p(start) * p(end) with start <= end inside [first, last].
+    best = (0.0, first, first)
+    starts = sorted(range(first, last + 1), key=lambda i: -start_probs[i])[:TOP_SPANS]
+    ends = sorted(range(first, last + 1), key=lambda i: -end_probs[i])[:TOP_SPANS]
+    for s in starts:
+        for e in ends:
+            if s <= e < s + max_answer_tokens:
+                score = start_probs[s] * end_probs[e]
+                if score > best[0]:
+                    best = (score, s, e)
+    return best
+
+
+def answer_questions(
+    pipe,
+    questions: Sequence[str],
+    passages: Sequence[str],
+    max_length: int = QA_MAX_LENGTH,
+    stride: int = QA_STRIDE,
+    batch_size: int = QA_BATCH_SIZE,
+    max_answer_tokens: int = MAX_ANSWER_TOKENS,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+) -> List[Dict]:
+    """Extractive answers for several questions over the same passages.
+
+    A question-answering pipeline tokenizes the context again for every
+    question. Here each passage is tokenized once, its windows are paired
+    with every question, and all pairs go through the model in a few
+    batches. Returns, per question, the best span as {"answer", "score"},
+    with scores comparable to the pipeline's.
+    """
+    import torch
+
+    tokenizer, model = pipe.tokenizer, pipe.model
+    with metrics.span("batch_qa_tokenize"):
+        question_ids = [tokenizer(q, add_special_tokens=False)["input_ids"] for q in questions]
+        encoded = [
+            tokenizer(p, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+            for p in passages
+        ]
+    longest_question = max((len(ids) for ids in question_ids), default=0)
+    window = max(16, max_length - longest_question - tokenizer.num_special_tokens_to_add(pair=True))
+
+    rows = []
+    for p, enc in enumerate(encoded):
+        ids = enc["input_ids"]
+        for start in _windows(len(ids), window, stride):
+            window_ids = ids[start:start + window]
+            for q, q_ids in enumerate(question_ids):
+                input_ids = tokenizer.build_inputs_with_special_tokens(q_ids, window_ids)
+                special = tokenizer.get_special_tokens_mask(q_ids, window_ids)
+                # Non-special tokens are the question's, then the window's.
+                context = [i for i, is_special in enumerate(special) if not is_special][len(q_ids):]
+                row = {"q": q, "p": p, "start": start, "input_ids": input_ids,
+                       "first": context[0] if context else 0, "last": context[-1] if context else 0}
+                if "token_type_ids" in tokenizer.model_input_names:
+                    row["token_type_ids"] = tokenizer.create_token_type_ids_from_sequences(q_ids, window_ids)
+                rows.append(row)
+
+    best = [{"answer": "", "score": 0.0} for _ in questions]
+    for batch_start in range(0, len(rows), batch_size):
+        batch = rows[batch_start:batch_start + batch_size]
+        features = [{k: row[k] for k in ("input_ids", "token_type_ids") if k in row} for row in batch]
+        inputs = tokenizer.pad(features, return_tensors="pt")
+        with metrics.span("batch_qa_forward"), torch.no_grad():
+            outputs = model(**inputs)
+        metrics.observe("batch_qa_rows", len(batch))
+        for i, row in enumerate(batch):
+            if not row["input_ids"] or row["last"] < row["first"]:
+                continue
+            # Softmax over the context tokens only, as the pipeline does.
+            start_logits = outputs.start_logits[i, row["first"]:row["last"] + 1]
+            end_logits = outputs.end_logits[i, row["first"]:row["last"] + 1]
+            start_probs = [0.0] * row["first"] + torch.softmax(start_logits, -1).tolist()
+            end_probs = [0.0] * row["first"] + torch.softmax(end_logits, -1).tolist()
+            score, s, e = _best_span(start_probs, end_probs, row["first"], row["last"], max_answer_tokens)
+            if score > best[row["q"]]["score"]:
+                offsets = encoded[row["p"]]["offset_mapping"]
+                token_s = row["start"] + s - row["first"]
+                token_e = row["start"] + e - row["first"]
+                best[row["q"]] = {
+                    "answer": passages[row["p"]][offsets[token_s][0]:offsets[token_e][1]],
+                    "score": score,
+                }
+        if progress:
+            progress(min(batch_start + batch_size, len(rows)), len(rows), "Answering suggestions")
+    return best
@@ -1,17 +1,96 @@
-import os
-import sqlite3
+import re
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-DB_PATH = "data/history.db"
+from logic import db
+from logic.metrics import metrics
+
+INSERT_CHAT_SQL = """
+    INSERT INTO chats (id, title, question, answer, pinned, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_CHATS_SQL = "SELECT * FROM chats ORDER BY created_at DESC"
+SELECT_PINNED_CHATS_SQL = "SELECT * FROM chats WHERE pinned = 1 ORDER BY created_at DESC"
+SELECT_CHAT_SQL = "SELECT * FROM chats WHERE id = ?"
+DELETE_CHAT_SQL = "DELETE FROM chats WHERE id = ?"
+UPDATE_TITLE_SQL = "UPDATE chats SET title = ?, updated_at = ? WHERE id = ?"
+TOGGLE_PIN_SQL = "UPDATE chats SET pinned = NOT pinned, updated_at = ? WHERE id = ?"
+# created_at is a local ISO timestamp, so it sorts against SQLite's local dates.
+PERIOD_SQL = """
+    CASE
+        WHEN created_at >= date('now', 'localtime') THEN 'Today'
+        WHEN created_at >= date('now', 'localtime', '-6 days') THEN 'This week'
+        ELSE 'Older'
+    END
+"""
+SELECT_CHAT_PAGE_SQL = f"""
+    SELECT id, title, pinned, created_at, {PERIOD_SQL} FROM chats
+    WHERE pinned = ?
+    ORDER BY created_at DESC, id DESC LIMIT ?
+"""
+SELECT_CHAT_PAGE_AFTER_SQL = f"""
+    SELECT id, title, pinned, created_at, {PERIOD_SQL} FROM chats
+    WHERE pinned = ? AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC LIMIT ?
+"""
+COUNT_CHATS_SQL = "SELECT COUNT(*) FROM chats WHERE pinned = ?"
+SEARCH_CHATS_SQL = """
+    SELECT c.id, c.title, c.pinned, c.created_at,
+           snippet(chats_fts, -1, '**', '**', '…', 12)
+    FROM chats_fts JOIN chats c ON c.id = chats_fts.chat_id
+    WHERE chats_fts MATCH ?
+    ORDER BY bm25(chats_fts, 10.0, 2.0, 1.0)
+    LIMIT ?
+"""
+FTS_TABLE_SQL = "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'chats_fts'"
+# The search table keeps its own copy of the text, keyed by chat id: chats
+# has a TEXT primary key, so its implicit rowid can change on VACUUM.
+FTS_SCHEMA_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chats_fts USING fts5(
+        title, question, answer, chat_id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chats_fts_insert AFTER INSERT ON chats BEGIN
+        INSERT INTO chats_fts(title, question, answer, chat_id)
+        VALUES (new.title, new.question, new.answer, new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chats_fts_delete AFTER DELETE ON chats BEGIN
+        DELETE FROM chats_fts WHERE chat_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chats_fts_update AFTER UPDATE OF title, question, answer ON chats BEGIN
+        UPDATE chats_fts SET title = new.title, question = new.question, answer = new.answer
+        WHERE chat_id = old.id;
+    END
+    """,
+)
+FTS_POPULATE_SQL = """
+    INSERT INTO chats_fts(title, question, answer, chat_id)
+    SELECT title, question, answer, id FROM chats
+"""
+# Search tables from older versions indexed chats by rowid.
+FTS_DROP_SQL = (
+    "DROP TRIGGER IF EXISTS chats_fts_insert",
+    "DROP TRIGGER IF EXISTS chats_fts_delete",
+    "DROP TRIGGER IF EXISTS chats_fts_update",
+    "DROP TABLE IF EXISTS chats_fts",
+)
+PHRASE_RE = re.compile(r'"([^"]+)"|(\w+)')
+UPDATABLE_COLUMNS = {"title", "question", "answer", "pinned"}
+HISTORY_PAGE_SIZE = 30
 
 
 class ChatHistory:
     @staticmethod
     def init_db():
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        with sqlite3.connect(DB_PATH) as conn:
+        with db.connection() as conn:
             conn.execute(
                 """
             CREATE TABLE IF NOT EXISTS chats (
@@ -27,9 +106,32 @@ class ChatHistory:
             )
             conn.execute("CREATE INDEX IF NOT EXISTS idx_pinned ON chats(pinned)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_created ON chats(created_at)")
-            conn.commit()
+            # Covers the sidebar page query so it never touches question/answer.
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_pinned_created ON chats(pinned, created_at, id, title)"
+            )
+            if not ChatHistory._fts_current(conn):
+                # Another process may be creating the table too; the check is
+                # repeated under the write lock so only one of them rebuilds.
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if not ChatHistory._fts_current(conn):
+                        for statement in FTS_DROP_SQL + FTS_SCHEMA_SQL:
+                            conn.execute(statement)
+                        # Index chats saved before the search table existed.
+                        conn.execute(FTS_POPULATE_SQL)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
 
     @staticmethod
+    def _fts_current(conn) -> bool:
+        row = conn.execute(FTS_TABLE_SQL).fetchone()
+        return row is not None and "chat_id" in row[0]
+
+    @staticmethod
+    @metrics.timed("history_write", op="save_chat")
     def save_chat(chat: Dict):
         if not chat.get("id"):
             chat["id"] = str(uuid.uuid4())
@@ -37,86 +139,119 @@ class ChatHistory:
         chat.setdefault("created_at", now)
         chat["updated_at"] = now
 
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                """
-                INSERT INTO chats (id, title, question, answer, pinned, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    chat["id"],
-                    chat["title"],
-                    chat["question"],
-                    chat["answer"],
-                    int(chat.get("pinned", False)),
-                    chat["created_at"],
-                    chat["updated_at"],
-                ),
-            )
-            conn.commit()
+        db.write(
+            INSERT_CHAT_SQL,
+            (
+                chat["id"],
+                chat["title"],
+                chat["question"],
+                chat["answer"],
+                int(chat.get("pinned", False)),
+                chat["created_at"],
+                chat["updated_at"],
+            ),
+        )
 
     @staticmethod
+    @metrics.timed("history_load")
     def load_history(pinned_only: bool = False) -> List[Dict]:
-        query = "SELECT * FROM chats ORDER BY created_at DESC"
-        if pinned_only:
-            query = "SELECT * FROM chats WHERE pinned = 1 ORDER BY created_at DESC"
+        query = SELECT_PINNED_CHATS_SQL if pinned_only else SELECT_CHATS_SQL
 
-        with sqlite3.connect(DB_PATH) as conn:
+        with db.connection() as conn:
             cursor = conn.execute(query)
             rows = cursor.fetchall()
             return [ChatHistory.dict_from_row(row) for row in rows]
 
     @staticmethod
+    @metrics.timed("history_page")
+    def list_chats(
+        pinned: bool = False, after: Optional[Tuple[str, str]] = None, limit: int = HISTORY_PAGE_SIZE
+    ) -> List[Dict]:
+        # Keyset pagination: `after` is the (created_at, id) of the last row
+        # of the previous page, so every page costs the same to fetch.
+        if after:
+            query, params = SELECT_CHAT_PAGE_AFTER_SQL, (int(pinned), after[0], after[1], limit)
+        else:
+            query, params = SELECT_CHAT_PAGE_SQL, (int(pinned), limit)
+        with db.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {"id": row[0], "title": row[1], "pinned": bool(row[2]), "created_at": row[3], "period": row[4]}
+            for row in rows
+        ]
+
+    @staticmethod
+    @metrics.timed("history_count")
+    def count_chats(pinned: bool = False) -> int:
+        # Answered from the pinned index without reading any chat rows.
+        with db.connection() as conn:
+            return conn.execute(COUNT_CHATS_SQL, (int(pinned),)).fetchone()[0]
+
+    @staticmethod
+    def page_cursor(page: List[Dict]) -> Optional[Tuple[str, str]]:
+        return (page[-1]["created_at"], page[-1]["id"]) if page else None
+
+    @staticmethod
+    def fts_query(text: str) -> str:
+        # "quoted text" is searched as a phrase, every other word as a prefix.
+        terms = []
+        for phrase, word in PHRASE_RE.findall(text):
+            if phrase.strip():
+                terms.append('"' + phrase.replace('"', '""') + '"')
+            elif word:
+                terms.append(f'"{word}"*')
+        return " ".join(terms)
+
+    @staticmethod
+    @metrics.timed("history_search")
+    def search_chats(text: str, limit: int = HISTORY_PAGE_SIZE) -> List[Dict]:
+        query = ChatHistory.fts_query(text)
+        if not query:
+            return []
+        with db.connection() as conn:
+            rows = conn.execute(SEARCH_CHATS_SQL, (query, limit)).fetchall()
+        return [
+            {"id": row[0], "title": row[1], "pinned": bool(row[2]), "created_at": row[3], "snippet": row[4]}
+            for row in rows
+        ]
+
+    @staticmethod
+    @metrics.timed("history_get")
     def get_chat(chat_id: str) -> Optional[Dict]:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.execute("SELECT * FROM chats WHERE id = ?", (chat_id,))
+        with db.connection() as conn:
+            cursor = conn.execute(SELECT_CHAT_SQL, (chat_id,))
             row = cursor.fetchone()
         return ChatHistory.dict_from_row(row) if row else None
 
     @staticmethod
+    @metrics.timed("history_write", op="delete_chat")
     def delete_chat(chat_id: str):
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
-            conn.commit()
+        db.write(DELETE_CHAT_SQL, (chat_id,))
 
     @staticmethod
+    @metrics.timed("history_write", op="update_title")
     def update_title(chat_id: str, new_title: str):
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                """
-                UPDATE chats SET title = ?, updated_at = ?
-                WHERE id = ?
-            """,
-                (new_title, datetime.now().isoformat(), chat_id),
-            )
-            conn.commit()
+        db.write(UPDATE_TITLE_SQL, (new_title, datetime.now().isoformat(), chat_id))
 
     @staticmethod
+    @metrics.timed("history_write", op="update_chat")
     def update_chat(chat_id: str, **updates):  # sourcery skip: merge-list-appends-into-extend, remove-dict-keys
         if not updates:
             return
+        unknown = set(updates) - UPDATABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update chat columns: {', '.join(sorted(unknown))}")
         set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
         values = list(updates.values())
         values.append(datetime.now().isoformat())
         values.append(chat_id)
 
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                f"UPDATE chats SET {set_clause}, updated_at = ? WHERE id = ?", values
-            )
-            conn.commit()
+        db.write(f"UPDATE chats SET {set_clause}, updated_at = ? WHERE id = ?", values)
 
     @staticmethod
+    @metrics.timed("history_write", op="toggle_pin")
     def toggle_pin(chat_id: str):
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.execute(
-                """
-                UPDATE chats SET pinned = NOT pinned, updated_at = ?
-                WHERE id = ?
-            """,
-                (datetime.now().isoformat(), chat_id),
-            )
-            conn.commit()
+        db.write(TOGGLE_PIN_SQL, (datetime.now().isoformat(), chat_id))
 
     @staticmethod
     def dict_from_row(row) -> Dict:
@@ -129,6 +264,3 @@ class ChatHistory:
             "created_at": row[5],
             "updated_at": row[6],
         }
-
-
-ChatHistory.init_db()
@@ -0,0 +1,137 @@
+import os
+from typing import Callable, Iterator, List, Optional
+
+from logic.metrics import metrics
+from logic.streaming import stream_generate
+
+# Number of chunks sent to the model in one forward pass. Larger batches keep
+# more cores busy at the cost of peak memory.
+SUMMARY_BATCH_SIZE = int(os.environ.get("EDUMATE_SUMMARY_BATCH_SIZE", "4"))
+CHUNK_OVERLAP_TOKENS = 64
+# Room for the special tokens the tokenizer adds around every input.
+SPECIAL_TOKENS_MARGIN = 8
+DEFAULT_MODEL_INPUT_LIMIT = 512
+
+ProgressCallback = Callable[[int, int, str], None]
+
+
+def model_input_limit(summarizer) -> int:
+    tokenizer = summarizer.tokenizer
+    limit = getattr(tokenizer, "model_max_length", None)
+    # Tokenizers without a known limit report a huge sentinel value.
+    if not limit or limit > 100_000:
+        config = getattr(summarizer.model, "config", None)
+        limit = (
+            getattr(config, "max_position_embeddings", None)
+            or getattr(config, "n_positions", None)
+            or DEFAULT_MODEL_INPUT_LIMIT
+        )
+    return int(limit)
+
+
+@metrics.timed("tokenize")
+def split_into_token_chunks(
+    tokenizer, text: str, chunk_tokens: int, overlap_tokens: int = CHUNK_OVERLAP_TOKENS
+) -> List[str]:
+    ids = tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+    if len(ids) <= chunk_tokens:
+        return [text]
+    overlap_tokens = min(overlap_tokens, chunk_tokens // 4)
+    step = chunk_tokens - overlap_tokens
+    chunks = []
+    for start in range(0, len(ids), step):
+        window = ids[start:start + chunk_tokens]
+        chunks.append(tokenizer.decode(window, skip_special_tokens=True))
+        if start + chunk_tokens >= len(ids):
+            break
+    return chunks
+
+
+def _count_tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+
+def _summarize_batch(summarizer, texts: List[str], prefix: str, batch_size: int, **generate_kwargs) -> List[str]:
+    with metrics.span("summarize_forward"):
+        outputs = summarizer(
+            [prefix + t for t in texts],
+            batch_size=batch_size,
+            truncation=True,
+            **generate_kwargs,
+        )
+    return [o["summary_text"] for o in outputs]
+
+
+def reduce_to_single_chunk(
+    summarizer,
+    text: str,
+    max_length: int,
+    min_length: int,
+    prefix: str = "",
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
+    # Map-reduce passes until what is left fits one model window.
+    tokenizer = summarizer.tokenizer
+    chunk_tokens = model_input_limit(summarizer) - _count_tokens(tokenizer, prefix) - SPECIAL_TOKENS_MARGIN
+    # Partial summaries must be clearly shorter than their chunk, otherwise
+    # the reduce step would not shrink the document.
+    map_max_length = max(min(max_length, chunk_tokens // 3), min_length + 1)
+    map_min_length = min(min_length, map_max_length // 2)
+
+    chunks = split_into_token_chunks(tokenizer, text, chunk_tokens)
+    level = 0
+    while len(chunks) > 1:
+        level += 1
+        partials: List[str] = []
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            partials.extend(
+                _summarize_batch(
+                    summarizer, batch, prefix, batch_size,
+                    max_length=map_max_length, min_length=map_min_length,
+                )
+            )
+            if progress:
+                progress(len(partials), len(chunks), f"Summarizing sections (pass {level})")
+        combined = "\n".join(partials)
+        chunks = split_into_token_chunks(tokenizer, combined, chunk_tokens, overlap_tokens=0)
+    return chunks[0] if chunks else ""
+
+
+def summarize_long_text(
+    summarizer,
+    text: str,
+    max_length: int,
+    min_length: int,
+    prefix: str = "",
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
+    chunk = reduce_to_single_chunk(summarizer, text, max_length, min_length, prefix, batch_size, progress)
+    if progress:
+        progress(0, 1, "Writing final summary")
+    summary = _summarize_batch(
+        summarizer, [chunk], prefix, 1, max_length=max_length, min_length=min_length
+    )[0]
+    if progress:
+        progress(1, 1, "Writing final summary")
+    return summary
+
+
+def stream_long_summary(
+    summarizer,
+    text: str,
+    max_length: int,
+    min_length: int,
+    prefix: str = "",
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None,
+    model_name: str = "",
+) -> Iterator[str]:
+    # Same as summarize_long_text, but the final pass is streamed token by token.
+    chunk = reduce_to_single_chunk(summarizer, text, max_length, min_length, prefix, batch_size, progress)
+    yield from stream_generate(
+        summarizer, chunk, model_name=model_name, prefix=prefix,
+        max_length=max_length, min_length=min_length,
+    )
@@ -0,0 +1,212 @@
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DB_PATH = "data/history.db"
+POOL_MAX_IDLE = 8
+# Upper bound on statements folded into a single group commit.
+GROUP_COMMIT_MAX_STATEMENTS = 512
+# How long a caller waits for its write to be committed before giving up.
+WRITE_TIMEOUT_SECONDS = float(os.environ.get("EDUMATE_DB_WRITE_TIMEOUT", "60"))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+)
+
+# (sql, params, executemany)
+Statement = Tuple[str, Sequence, bool]
+
+
+def open_connection(path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Autocommit mode: readers never hold a transaction open, writers BEGIN
+    # explicitly. The statement cache keeps our fixed SQL strings prepared.
+    conn = sqlite3.connect(
+        path, timeout=30, isolation_level=None, check_same_thread=False, cached_statements=256
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    # One shared idle list rather than a connection per thread: Streamlit
+    # runs every rerun on a new script thread, so thread-local connections
+    # would be opened and thrown away on each rerun instead of reused.
+    def __init__(self, path: str, max_idle: int = POOL_MAX_IDLE):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = open_connection(self.path)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class GroupCommitWriter:
+    """Single writer thread that commits everything queued meanwhile in one transaction."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._queue: "queue.Queue[Tuple[List[Statement], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=f"sqlite-writer:{pool.path}", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return not self._stopped and self._thread.is_alive()
+
+    def submit(self, statements: List[Statement]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                future.set_exception(sqlite3.OperationalError("database writer has stopped"))
+            else:
+                self._queue.put((statements, future))
+        return future
+
+    def _run(self):
+        batch = []
+        try:
+            with self.pool.connection() as conn:
+                while True:
+                    batch = [self._queue.get()]
+                    size = len(batch[0][0])
+                    # Whatever piled up while the previous commit was running
+                    # joins this one; a lone writer never waits.
+                    while size < GROUP_COMMIT_MAX_STATEMENTS:
+                        try:
+                            item = self._queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        batch.append(item)
+                        size += len(item[0])
+                    self._commit(conn, batch)
+        except BaseException as exc:
+            # Nothing will commit what is still queued, so fail it now;
+            # get_writer() starts a new writer for the next caller.
+            with self._lock:
+                self._stopped = True
+            error = sqlite3.OperationalError(f"database writer stopped: {exc}")
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+
+    def _commit(self, conn: sqlite3.Connection, batch):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            results = [self._apply(conn, statements) for statements, _ in batch]
+            conn.execute("COMMIT")
+        except Exception as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if len(batch) > 1:
+                # Retry one by one so a bad statement only fails its caller.
+                for item in batch:
+                    self._commit(conn, [item])
+                return
+            batch[0][1].set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, statements: List[Statement]) -> List[int]:
+        rowcounts = []
+        for sql, params, many in statements:
+            cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+            rowcounts.append(cursor.rowcount)
+        return rowcounts
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_writers: Dict[str, GroupCommitWriter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_pool(path: Optional[str] = None) -> ConnectionPool:
+    path = path or DB_PATH
+    with _registry_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def get_writer(path: Optional[str] = None) -> GroupCommitWriter:
+    path = path or DB_PATH
+    pool = get_pool(path)
+    with _registry_lock:
+        writer = _writers.get(path)
+        if writer is None or not writer.alive:
+            writer = _writers[path] = GroupCommitWriter(pool)
+        return writer
+
+
+def connection(path: Optional[str] = None):
+    return get_pool(path).connection()
+
+
+def commit(statements: List[Statement], path: Optional[str] = None) -> List[int]:
+    """Commits statements atomically through the writer; returns their row counts."""
+    future = get_writer(path).submit(statements)
+    try:
+        return future.result(timeout=WRITE_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # A stalled writer must not hang every script thread with it.
+        raise sqlite3.OperationalError(
+            f"database write not committed within {WRITE_TIMEOUT_SECONDS:g}s"
+        ) from None
+
+
+def write(sql: str, params: Sequence = (), path: Optional[str] = None) -> int:
+    return commit([(sql, params, False)], path)[0]
+
+
+def write_many(sql: str, rows: Iterable[Sequence], path: Optional[str] = None) -> int:
+    return commit([(sql, list(rows), True)], path)[0]
+
+
+def write_batch(statements: List[Tuple[str, Sequence]], path: Optional[str] = None) -> List[int]:
+    # Statements submitted together are committed atomically.
+    return commit([(sql, params, False) for sql, params in statements], path)
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+from logic.metrics import metrics
+
+DOCUMENTS_DIR = "data/documents"
+DOCUMENT_CACHE_MAX_ENTRIES = int(os.environ.get("EDUMATE_DOCUMENT_CACHE_ENTRIES", "32"))
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: str, write: Callable[[str], None]):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class DocumentStore:
+    """Extracted uploads and their derived artifacts, keyed by SHA-256, in memory and on disk."""
+
+    def __init__(self, root: str = DOCUMENTS_DIR, max_entries: int = DOCUMENT_CACHE_MAX_ENTRIES):
+        self.root = root
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._extracting: Dict[str, threading.Lock] = {}
+
+    def get(self, doc_hash: str) -> Optional[Dict]:
+        with self._lock:
+            doc = self._memory.get(doc_hash)
+            if doc is not None:
+                self._memory.move_to_end(doc_hash)
+                metrics.cache_lookup("document", True, tier="memory")
+                return doc
+        doc = self._read_document(doc_hash)
+        if doc is None:
+            metrics.cache_lookup("document", False)
+            return None
+        self._remember(doc)
+        metrics.cache_lookup("document", True, tier="disk")
+        return doc
+
+    def get_or_extract(self, data: bytes, kind: str, extract_pages: Callable[[bytes], List[str]]) -> Dict:
+        doc_hash = content_hash(data)
+        doc = self.get(doc_hash)
+        if doc is not None:
+            return doc
+        with self._lock:
+            lock = self._extracting.setdefault(doc_hash, threading.Lock())
+        # Two sessions uploading the same handout extract it only once.
+        with lock:
+            doc = self.get(doc_hash)
+            if doc is None:
+                doc = self.put(doc_hash, kind, extract_pages(data))
+            with self._lock:
+                self._extracting.pop(doc_hash, None)
+        return doc
+
+    def put(self, doc_hash: str, kind: str, pages: List[str]) -> Dict:
+        joined = "\n".join(pages)
+        text = joined.strip()
+        leading = len(joined) - len(joined.lstrip())
+        page_offsets = []
+        offset = -leading
+        for page in pages:
+            page_offsets.append(max(offset, 0))
+            offset += len(page) + 1
+        doc = {
+            "hash": doc_hash,
+            "kind": kind,
+            "text": text,
+            "page_offsets": page_offsets,
+            "created_at": datetime.now().isoformat(),
+            "artifacts": {},
+        }
+        self._write_document(doc)
+        self._remember(doc)
+        return doc
+
+    def get_artifact(self, doc_hash: str, name: str, default: Any = None) -> Any:
+        doc = self.get(doc_hash)
+        if doc is None:
+            return default
+        kind = name.split(":", 1)[0]
+        if name in doc["artifacts"]:
+            metrics.cache_lookup("artifact", True, artifact=kind, tier="memory")
+            return doc["artifacts"][name]
+        value = self._read_artifact(doc_hash, name)
+        if value is None:
+            metrics.cache_lookup("artifact", False, artifact=kind)
+            return default
+        doc["artifacts"][name] = value
+        metrics.cache_lookup("artifact", True, artifact=kind, tier="disk")
+        return value
+
+    def put_artifact(self, doc_hash: str, name: str, value: Any):
+        doc = self.get(doc_hash)
+        if doc is None:
+            raise KeyError(f"Unknown document {doc_hash}")
+        doc["artifacts"][name] = value
+        self._write_artifact(doc_hash, name, value)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, doc: Dict):
+        with self._lock:
+            self._memory[doc["hash"]] = doc
+            self._memory.move_to_end(doc["hash"])
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _doc_dir(self, doc_hash: str) -> str:
+        return os.path.join(self.root, doc_hash)
+
+    def _artifact_path(self, doc_hash: str, name: str, suffix: str) -> str:
+        return os.path.join(self._doc_dir(doc_hash), "artifacts", quote(name, safe="") + suffix)
+
+    def _write_document(self, doc: Dict):
+        os.makedirs(os.path.join(self._doc_dir(doc["hash"]), "artifacts"), exist_ok=True)
+        record = {k: v for k, v in doc.items() if k != "artifacts"}
+        path = os.path.join(self._doc_dir(doc["hash"]), "document.json")
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+
+        _write_atomic(path, write)
+
+    def _read_document(self, doc_hash: str) -> Optional[Dict]:
+        path = os.path.join(self._doc_dir(doc_hash), "document.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, ValueError):
+            return None
+        doc["artifacts"] = {}
+        return doc
+
+    def _write_artifact(self, doc_hash: str, name: str, value: Any):
+        path = self._artifact_path(doc_hash, name, ".json")
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+
+        _write_atomic(path, write)
+
+    def _read_artifact(self, doc_hash: str, name: str) -> Any:
+        try:
+            with open(self._artifact_path(doc_hash, name, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+document_store = DocumentStore()
@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from logic import db
+
+JOB_WORKERS = int(os.environ.get("EDUMATE_JOB_WORKERS", "2"))
+# Progress is written to SQLite at most this often per job.
+PROGRESS_WRITE_INTERVAL = 0.5
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+INSERT_JOB_SQL = """
+    INSERT INTO jobs (id, kind, key, status, progress, message, owner_pid, created_at, updated_at)
+    VALUES (?, ?, ?, 'queued', 0, '', ?, ?, ?)
+"""
+SELECT_JOB_SQL = "SELECT * FROM jobs WHERE id = ?"
+SELECT_ACTIVE_JOB_SQL = """
+    SELECT id FROM jobs WHERE key = ? AND status IN ('queued', 'running')
+    ORDER BY created_at DESC LIMIT 1
+"""
+UPDATE_STATUS_SQL = "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?"
+UPDATE_PROGRESS_SQL = "UPDATE jobs SET progress = ?, message = ?, updated_at = ? WHERE id = ?"
+FINISH_JOB_SQL = "UPDATE jobs SET status = ?, result = ?, error = ?, progress = ?, updated_at = ? WHERE id = ?"
+REQUEST_CANCEL_SQL = "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?"
+SELECT_ORPHANED_SQL = "SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class JobContext:
+    """Handed to job functions to report progress and notice cancellation."""
+
+    def __init__(self, runner: "JobRunner", job_id: str):
+        self.runner = runner
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job_id in self.runner._cancelled
+
+    def progress(self, done: int, total: int, message: str = ""):
+        if self.cancelled:
+            raise JobCancelled()
+        now = time.monotonic()
+        if now - self._last_write < PROGRESS_WRITE_INTERVAL and done < total:
+            return
+        self._last_write = now
+        fraction = done / total if total else 0.0
+        db.write(UPDATE_PROGRESS_SQL, (fraction, message, datetime.now().isoformat(), self.job_id))
+
+
+class JobRunner:
+    """Runs long tasks on a thread pool and keeps their state and results in SQLite."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="edumate-job")
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._db_ready = False
+
+    def init_db(self):
+        with db.connection() as conn:
+            conn.execute(
+                """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL DEFAULT 0,
+                message TEXT DEFAULT '',
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                owner_pid INTEGER,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_key_status ON jobs(key, status)")
+            orphaned = conn.execute(SELECT_ORPHANED_SQL).fetchall()
+        # Jobs left running by a process that has since died never finish.
+        now = datetime.now().isoformat()
+        dead = [
+            ("failed", None, "Interrupted before it finished", 0, now, job_id)
+            for job_id, pid in orphaned
+            if pid != os.getpid() and not (pid and _pid_alive(pid))
+        ]
+        if dead:
+            db.write_many(FINISH_JOB_SQL, dead)
+        self._db_ready = True
+
+    def submit(self, kind: str, key: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        # A rerun or a second session asking for the same work attaches to
+        # the job that is already running instead of starting another one.
+        if not self._db_ready:
+            self.init_db()
+        with self._lock:
+            active = self.active_job_id(key)
+            if active:
+                return active
+            job_id = str(uuid.uuid4())
+            now = datetime.now().isoformat()
+            db.write(INSERT_JOB_SQL, (job_id, kind, key, os.getpid(), now, now))
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        if not self._db_ready:
+            self.init_db()
+        with db.connection() as conn:
+            cursor = conn.execute(SELECT_JOB_SQL, (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([c[0] for c in cursor.description], row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def cancel(self, job_id: str):
+        with self._lock:
+            self._cancelled.add(job_id)
+        db.write(REQUEST_CANCEL_SQL, (datetime.now().isoformat(), job_id))
+
+    def active_job_id(self, key: str) -> Optional[str]:
+        if not self._db_ready:
+            self.init_db()
+        with db.connection() as conn:
+            row = conn.execute(SELECT_ACTIVE_JOB_SQL, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args, kwargs):
+        job = JobContext(self, job_id)
+        if job.cancelled:
+            self._finish(job_id, "cancelled")
+            return
+        db.write(UPDATE_STATUS_SQL, ("running", datetime.now().isoformat(), job_id))
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job_id, "cancelled")
+        except Exception as exc:
+            self._finish(job_id, "failed", error=str(exc))
+        else:
+            self._finish(job_id, "done", result=result)
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None):
+        progress = 1.0 if status == "done" else 0.0
+        db.write(
+            FINISH_JOB_SQL,
+            (status, json.dumps(result), error, progress, datetime.now().isoformat(), job_id),
+        )
+        with self._lock:
+            self._cancelled.discard(job_id)
+
+
+job_runner = JobRunner()
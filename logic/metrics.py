@@ -0,0 +1,172 @@
+import functools
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Observations kept per series for percentile estimates.
+SAMPLE_WINDOW = 1024
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prometheus_name(name: str) -> str:
+    return "edumate_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels: Dict, **extra) -> str:
+    pairs = {**labels, **extra}
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs.items()) + "}"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class _Summary:
+    __slots__ = ("count", "total", "maximum", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+        self.samples.append(value)
+
+    def snapshot(self) -> Dict:
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.maximum,
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+        }
+
+
+class Metrics:
+    """Process-wide counters, gauges and summaries, cheap enough to leave on."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, _Summary]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def set_gauges(self, name: str, series: List[Tuple[Dict, float]]):
+        # Replaces every series of a gauge, e.g. when a model is unloaded.
+        with self._lock:
+            self._gauges[name] = {_label_key(labels): value for labels, value in series}
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = _Summary()
+            summary.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        # Times one stage of a request; costs two clock reads and a lock.
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - started, stage=stage, **labels)
+
+    def timed(self, stage: str, **labels):
+        """Decorator form of span()."""
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def cache_lookup(self, cache: str, hit: bool, **labels):
+        self.inc("cache_hits_total" if hit else "cache_misses_total", cache=cache, **labels)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                    for name, series in self._gauges.items()
+                },
+                "summaries": {
+                    name: [{"labels": dict(k), **s.snapshot()} for k, s in series.items()]
+                    for name, series in self._summaries.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        # Prometheus text exposition format; summaries export their window's
+        # p50/p95 as quantiles next to the running count and sum.
+        snapshot = self.snapshot()
+        lines = []
+        for kind, section in (("counter", "counters"), ("gauge", "gauges")):
+            for name, series in sorted(snapshot[section].items()):
+                metric = _prometheus_name(name)
+                lines.append(f"# TYPE {metric} {kind}")
+                for item in series:
+                    lines.append(f"{metric}{_prometheus_labels(item['labels'])} {item['value']}")
+        for name, series in sorted(snapshot["summaries"].items()):
+            metric = _prometheus_name(name)
+            lines.append(f"# TYPE {metric} summary")
+            for item in series:
+                labels = item["labels"]
+                lines.append(f"{metric}{_prometheus_labels(labels, quantile='0.5')} {item['p50']}")
+                lines.append(f"{metric}{_prometheus_labels(labels, quantile='0.95')} {item['p95']}")
+                lines.append(f"{metric}_sum{_prometheus_labels(labels)} {item['sum']}")
+                lines.append(f"{metric}_count{_prometheus_labels(labels)} {item['count']}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from logic.metrics import metrics
+
+# Set to serve /metrics (Prometheus text) and /metrics.json on this port.
+METRICS_PORT = int(os.environ.get("EDUMATE_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("EDUMATE_METRICS_HOST", "127.0.0.1")
+
+
+def resident_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is the peak, in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def update_process_gauges():
+    # Sampled when metrics are read rather than on a timer.
+    times = os.times()
+    metrics.set_gauge("process_resident_memory_bytes", resident_memory_bytes())
+    metrics.set_gauge("process_cpu_seconds", times.user + times.system)
+    metrics.set_gauge("process_threads", threading.active_count())
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path not in ("/metrics", "/metrics.json"):
+            self.send_error(404)
+            return
+        update_process_gauges()
+        if path == "/metrics":
+            body = metrics.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(metrics.snapshot()).encode("utf-8")
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood the app's stderr.
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Serves metrics from a daemon thread, once per process; port 0 disables it."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="edumate-metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,178 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from logic.backends import backend_for, load_pipeline, model_size_bytes
+from logic.metrics import metrics
+
+# Total size of loaded weights the process may keep around. Idle models are
+# evicted least-recently-used first once the budget is exceeded; models that
+# are still referenced are never evicted.
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("EDUMATE_MODEL_MEMORY_MB", "3072"))
+
+
+def _resolve_kwargs(model: str, kwargs: Dict) -> Dict:
+    # The backend is part of the key, so a model can be held in several forms.
+    return {**kwargs, "backend": kwargs.get("backend") or backend_for(model)}
+
+
+def _model_key(task: str, model: str, kwargs: Dict) -> Tuple:
+    return (task, model, tuple(sorted(kwargs.items())))
+
+
+def _release_memory():
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class _Entry:
+    __slots__ = ("pipeline", "size_bytes", "refcount", "last_used")
+
+    def __init__(self, pipeline, size_bytes: int):
+        self.pipeline = pipeline
+        self.size_bytes = size_bytes
+        self.refcount = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """Process-wide cache of transformers pipelines shared by every session."""
+
+    def __init__(self, memory_budget_mb: int = MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: Dict[Tuple, threading.Lock] = {}
+
+    def acquire(self, task: str, model: str, **kwargs):
+        return self._get(task, model, kwargs, hold=True)
+
+    def get(self, task: str, model: str, **kwargs):
+        return self._get(task, model, kwargs, hold=False)
+
+    def release(self, task: str, model: str, **kwargs):
+        key = _model_key(task, model, _resolve_kwargs(model, kwargs))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.refcount > 0:
+                entry.refcount -= 1
+            evicted = self._evict_over_budget()
+            self._update_gauges()
+        if evicted:
+            _release_memory()
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            idle = [k for k, e in self._entries.items() if e.refcount == 0]
+            for key in idle:
+                del self._entries[key]
+            self._update_gauges()
+        if idle:
+            metrics.inc("model_evictions_total", len(idle))
+            _release_memory()
+        return len(idle)
+
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size_bytes for e in self._entries.values())
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "task": key[0],
+                    "model": key[1],
+                    "backend": dict(key[2]).get("backend"),
+                    "size_mb": round(entry.size_bytes / (1024 * 1024), 1),
+                    "refcount": entry.refcount,
+                    "last_used": entry.last_used,
+                }
+                for key, entry in self._entries.items()
+            ]
+
+    def _get(self, task: str, model: str, kwargs: Dict, hold: bool):
+        kwargs = _resolve_kwargs(model, kwargs)
+        key = _model_key(task, model, kwargs)
+        with self._lock:
+            entry = self._touch(key, hold)
+            if entry:
+                metrics.cache_lookup("model", True)
+                return entry.pipeline
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        metrics.cache_lookup("model", False)
+
+        # Load outside the registry lock so other models stay available, but
+        # only once per key: concurrent sessions wait for the first loader.
+        with load_lock:
+            with self._lock:
+                entry = self._touch(key, hold)
+                if entry:
+                    return entry.pipeline
+            with metrics.span("model_load", model=model, backend=kwargs["backend"]):
+                pipe = self._load(task, model, kwargs)
+            with self._lock:
+                entry = _Entry(pipe, model_size_bytes(pipe))
+                self._entries[key] = entry
+                self._loading.pop(key, None)
+                self._touch(key, hold)
+                evicted = self._evict_over_budget()
+                self._update_gauges()
+        if evicted:
+            _release_memory()
+        return pipe
+
+    def _touch(self, key: Tuple, hold: bool) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        entry.last_used = time.time()
+        if hold:
+            entry.refcount += 1
+        return entry
+
+    def _evict_over_budget(self) -> int:
+        if self.memory_budget_bytes <= 0:
+            return 0
+        used = sum(e.size_bytes for e in self._entries.values())
+        evicted = 0
+        # The most recently used entry is the one the caller just asked for.
+        for key in list(self._entries.keys())[:-1]:
+            if used <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refcount == 0:
+                used -= entry.size_bytes
+                del self._entries[key]
+                evicted += 1
+        if evicted:
+            metrics.inc("model_evictions_total", evicted)
+        return evicted
+
+    def _update_gauges(self):
+        # Called with the registry lock held whenever the set of models changes.
+        metrics.set_gauges(
+            "model_memory_bytes",
+            [
+                ({"task": key[0], "model": key[1], "backend": dict(key[2]).get("backend")}, entry.size_bytes)
+                for key, entry in self._entries.items()
+            ],
+        )
+        metrics.set_gauge("model_memory_used_bytes", sum(e.size_bytes for e in self._entries.values()))
+        metrics.set_gauge("model_memory_budget_bytes", self.memory_budget_bytes)
+        metrics.set_gauge("models_loaded", len(self._entries))
+
+    @staticmethod
+    def _load(task: str, model: str, kwargs: Dict):
+        return load_pipeline(task, model, **kwargs)
+
+
+registry = ModelRegistry()
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+
+from logic.metrics import metrics
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Resolution pages are rendered at and the ceiling uploads are scaled down to.
+OCR_DPI = 300
+# Longest image side sent to Tesseract; phone photos are ~4000px and take
+# several times longer to recognise without being any more legible.
+OCR_MAX_SIDE = int(os.environ.get("EDUMATE_OCR_MAX_SIDE", "2400"))
+OCR_WORKERS = int(os.environ.get("EDUMATE_OCR_WORKERS", "0"))
+OCR_CACHE_MAX_ENTRIES = 256
+
+WINDOWS_TESSERACT_PATHS = [
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+]
+
+
+def find_tesseract() -> Optional[str]:
+    configured = os.environ.get("TESSERACT_CMD")
+    if configured:
+        return configured
+    found = shutil.which("tesseract")
+    if found:
+        return found
+    for path in WINDOWS_TESSERACT_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def configure_tesseract():
+    import pytesseract
+
+    cmd = find_tesseract()
+    if cmd:
+        pytesseract.pytesseract.tesseract_cmd = cmd
+    return cmd
+
+
+_pytesseract = None
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _tesseract():
+    # pytesseract (and PIL with it) is imported on the first OCR call rather
+    # than when the app starts.
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+
+        configure_tesseract()
+        _pytesseract = pytesseract
+    return _pytesseract
+
+
+def image_hash(image: "Image.Image") -> str:
+    digest = hashlib.sha256(image.tobytes())
+    digest.update(f"{image.mode}{image.size}".encode())
+    return digest.hexdigest()
+
+
+def _otsu_threshold(image: "Image.Image") -> int:
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background_count, background_sum = 0, 0
+    best_threshold, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
+
+
+def preprocess_image(image: "Image.Image") -> "Image.Image":
+    from PIL import Image, ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > OCR_DPI:
+        scale = OCR_DPI / float(dpi[0])
+    longest = max(image.size) * scale
+    if longest > OCR_MAX_SIDE:
+        scale *= OCR_MAX_SIDE / longest
+    if scale < 1.0:
+        size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    image = ImageOps.autocontrast(image)
+    threshold = _otsu_threshold(image)
+    return image.point(lambda p: 255 if p > threshold else 0, mode="1")
+
+
+def ocr_image(image: "Image.Image") -> str:
+    key = image_hash(image)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            metrics.cache_lookup("ocr", True)
+            return _cache[key]
+    metrics.cache_lookup("ocr", False)
+    with metrics.span("ocr_preprocess"):
+        prepared = preprocess_image(image)
+    with metrics.span("ocr"):
+        text = _tesseract().image_to_string(prepared).strip()
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > OCR_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return text
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def ocr_images(images: List["Image.Image"], workers: Optional[int] = None) -> List[str]:
+    if not images:
+        return []
+    if workers is None:
+        from logic.utils import available_cpus
+
+        workers = OCR_WORKERS or available_cpus()
+    if workers <= 1 or len(images) == 1:
+        return [ocr_image(image) for image in images]
+    # Tesseract runs as a subprocess, so threads are enough to use every core.
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as pool:
+        return list(pool.map(ocr_image, images))
+
+
+def ocr_image_files(image_files, workers: Optional[int] = None) -> List[str]:
+    from PIL import Image
+
+    images = []
+    for image_file in image_files:
+        with Image.open(image_file) as image:
+            image.load()
+            images.append(image)
+    return ocr_images(images, workers)
@@ -0,0 +1,234 @@
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Sequence
+
+from logic import db
+from logic.metrics import metrics
+
+TOPICS_SHOWN = 10
+TREND_WEEKS = 12
+# A streak longer than this is shown as this many days.
+STREAK_MAX_DAYS = 366
+
+INSERT_ATTEMPT_SQL = """
+    INSERT INTO quiz_attempts (id, topic, level, questions, correct, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+INSERT_ANSWER_SQL = """
+    INSERT INTO quiz_answers (attempt_id, position, question, chosen, correct_index, is_correct)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+# Rollups are bumped in the same transaction as the rows they summarize, so
+# dashboard reads never scan attempts.
+BUMP_DAY_SQL = """
+    INSERT INTO progress_daily (day, attempts, questions, correct, steps_completed)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(day) DO UPDATE SET
+        attempts = attempts + excluded.attempts, questions = questions + excluded.questions,
+        correct = correct + excluded.correct, steps_completed = steps_completed + excluded.steps_completed
+"""
+BUMP_TOTALS_SQL = """
+    INSERT INTO progress_totals (id, attempts, questions, correct) VALUES (1, 1, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET attempts = attempts + 1,
+        questions = questions + excluded.questions, correct = correct + excluded.correct
+"""
+BUMP_TOPIC_SQL = """
+    INSERT INTO topic_stats (topic, attempts, questions, correct, last_attempt_at)
+    VALUES (?, 1, ?, ?, ?)
+    ON CONFLICT(topic) DO UPDATE SET
+        attempts = attempts + 1, questions = questions + excluded.questions,
+        correct = correct + excluded.correct, last_attempt_at = excluded.last_attempt_at
+"""
+COMPLETE_STEP_SQL = "INSERT OR IGNORE INTO study_steps (plan_id, step, completed_at) VALUES (?, ?, ?)"
+UNCOMPLETE_STEP_SQL = "DELETE FROM study_steps WHERE plan_id = ? AND step = ?"
+SELECT_STEPS_SQL = "SELECT step, completed_at FROM study_steps WHERE plan_id = ?"
+SELECT_TOTALS_SQL = "SELECT attempts, questions, correct FROM progress_totals WHERE id = 1"
+SELECT_ACTIVE_DAYS_SQL = """
+    SELECT day FROM progress_daily WHERE attempts > 0 OR steps_completed > 0
+    ORDER BY day DESC LIMIT ?
+"""
+SELECT_WEEKLY_SQL = """
+    SELECT date(day, 'weekday 0', '-6 days') AS week,
+           SUM(attempts), SUM(questions), SUM(correct), SUM(steps_completed)
+    FROM progress_daily WHERE day >= ?
+    GROUP BY week ORDER BY week
+"""
+SELECT_TOPICS_SQL = """
+    SELECT topic, attempts, questions, correct FROM topic_stats
+    ORDER BY last_attempt_at DESC LIMIT ?
+"""
+
+
+def init_progress():
+    with db.connection() as conn:
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS quiz_attempts (
+            id TEXT PRIMARY KEY,
+            topic TEXT NOT NULL,
+            level TEXT NOT NULL,
+            questions INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_attempts_created ON quiz_attempts(created_at)")
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS quiz_answers (
+            attempt_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            chosen INTEGER NOT NULL,
+            correct_index INTEGER NOT NULL,
+            is_correct INTEGER NOT NULL,
+            PRIMARY KEY (attempt_id, position)
+        )
+        """
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS study_steps (
+            plan_id TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            completed_at TEXT NOT NULL,
+            PRIMARY KEY (plan_id, step)
+        )
+        """
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS progress_daily (
+            day TEXT PRIMARY KEY,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            questions INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            steps_completed INTEGER NOT NULL DEFAULT 0
+        )
+        """
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS progress_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            attempts INTEGER NOT NULL,
+            questions INTEGER NOT NULL,
+            correct INTEGER NOT NULL
+        )
+        """
+        )
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS topic_stats (
+            topic TEXT PRIMARY KEY,
+            attempts INTEGER NOT NULL,
+            questions INTEGER NOT NULL,
+            correct INTEGER NOT NULL,
+            last_attempt_at TEXT NOT NULL
+        )
+        """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_topic_stats_last ON topic_stats(last_attempt_at)")
+
+
+def _commit(statements: List[db.Statement]):
+    # One group commit for the rows and the rollups they feed.
+    return db.commit(statements)
+
+
+@metrics.timed("progress_write", op="quiz_attempt")
+def record_quiz_attempt(
+    topic: str,
+    level: str,
+    questions: Sequence[str],
+    chosen: Sequence[int],
+    correct_indices: Sequence[int],
+) -> str:
+    attempt_id = str(uuid.uuid4())
+    now = datetime.now()
+    results = [int(c == k) for c, k in zip(chosen, correct_indices)]
+    correct = sum(results)
+    topic = " ".join(topic.split())
+    _commit([
+        (INSERT_ATTEMPT_SQL, (attempt_id, topic, level, len(results), correct, now.isoformat()), False),
+        (
+            INSERT_ANSWER_SQL,
+            [
+                (attempt_id, i, q, c, k, r)
+                for i, (q, c, k, r) in enumerate(zip(questions, chosen, correct_indices, results))
+            ],
+            True,
+        ),
+        (BUMP_DAY_SQL, (now.date().isoformat(), 1, len(results), correct, 0), False),
+        (BUMP_TOTALS_SQL, (len(results), correct), False),
+        (BUMP_TOPIC_SQL, (topic.lower(), len(results), correct, now.isoformat()), False),
+    ])
+    return attempt_id
+
+
+@metrics.timed("progress_load", op="study_steps")
+def completed_steps(plan_id: str) -> Dict[int, str]:
+    """Completed step numbers of a plan, with when each was ticked."""
+    with db.connection() as conn:
+        return dict(conn.execute(SELECT_STEPS_SQL, (plan_id,)).fetchall())
+
+
+@metrics.timed("progress_write", op="study_steps")
+def update_steps(plan_id: str, changes: Dict[int, bool], completed: Dict[int, str]):
+    # Every checkbox changed in one rerun is saved together. Unticking a
+    # step takes it off the day it was ticked.
+    now = datetime.now()
+    statements = []
+    for step, done in changes.items():
+        if done and step not in completed:
+            statements.append((COMPLETE_STEP_SQL, (plan_id, step, now.isoformat()), False))
+            statements.append((BUMP_DAY_SQL, (now.date().isoformat(), 0, 0, 0, 1), False))
+        elif not done and step in completed:
+            statements.append((UNCOMPLETE_STEP_SQL, (plan_id, step), False))
+            statements.append((BUMP_DAY_SQL, (completed[step][:10], 0, 0, 0, -1), False))
+    if statements:
+        _commit(statements)
+
+
+def _streak(active_days: List[str], today: date) -> int:
+    # Counts back from today, or from yesterday if nothing happened today yet.
+    expected = today
+    streak = 0
+    for day in active_days:
+        current = date.fromisoformat(day)
+        if streak == 0 and current == today - timedelta(days=1):
+            expected = current
+        if current != expected:
+            break
+        streak += 1
+        expected = current - timedelta(days=1)
+    return streak
+
+
+@metrics.timed("progress_load", op="dashboard")
+def dashboard_stats() -> Dict:
+    """Everything the Progress Dashboard shows, read from the rollup tables."""
+    today = date.today()
+    first_week = today - timedelta(days=today.weekday() + 7 * (TREND_WEEKS - 1))
+    with db.connection() as conn:
+        attempts, questions, correct = conn.execute(SELECT_TOTALS_SQL).fetchone() or (0, 0, 0)
+        active_days = [row[0] for row in conn.execute(SELECT_ACTIVE_DAYS_SQL, (STREAK_MAX_DAYS,))]
+        weekly = conn.execute(SELECT_WEEKLY_SQL, (first_week.isoformat(),)).fetchall()
+        topics = conn.execute(SELECT_TOPICS_SQL, (TOPICS_SHOWN,)).fetchall()
+    return {
+        "quizzes_taken": attempts,
+        "questions_answered": questions,
+        "total_correct": correct,
+        "average_score": correct / attempts if attempts else 0.0,
+        "accuracy": correct / questions if questions else 0.0,
+        "streak_days": _streak(active_days, today),
+        "weekly": [
+            {"week": week, "quizzes": a, "accuracy": c / q if q else 0.0, "steps_completed": s}
+            for week, a, q, c, s in weekly
+        ],
+        "topics": [
+            {"topic": topic, "quizzes": a, "accuracy": c / q if q else 0.0}
+            for topic, a, q, c in topics
+        ],
+    }
@@ -1,21 +1,17 @@
 import os
-import streamlit as st
 
 os.environ["HF_HUB_DOWNLOAD_TIMEOUT"] = "1000"
-from transformers import pipeline
+from logic.assistant import SESSION_MODELS, get_model
+from logic.streaming import stream_generate
 
 
-@st.cache_resource
+# The app's own models, so both share one loaded copy and one request queue.
 def get_doc_qa():
-    return pipeline("question-answering", model="deepset/tinyroberta-squad2")
+    return get_model("qa_pipeline")
 
-doc_qa = get_doc_qa()
 
-@st.cache_resource
 def get_general_qa():
-    return pipeline("text2text-generation", model="google/flan-t5-small")
-
-general_qa = get_general_qa()
+    return get_model("general_qa")
 
 
 def ask_about_document(question, context):
@@ -23,7 +19,7 @@ def ask_about_document(question, context):
         return "Provide both question and document text."
 
     try:
-        result = doc_qa(question=question, context=context)
+        result = get_doc_qa()({"question": question, "context": context})
         return result["answer"]
     except Exception as e:
         return f"Document QA failed: {str(e)}"
@@ -34,7 +30,20 @@ def ask_general_question(question):
         return "Question cannot be empty."
 
     try:
-        result = general_qa(question, max_length=256)
+        result = get_general_qa()(question, max_length=256)
         return result[0]["generated_text"]
     except Exception as e:
         return f"General QA failed: {str(e)}"
+
+
+def ask_general_question_stream(question):
+    if not question.strip():
+        yield "Question cannot be empty."
+        return
+
+    try:
+        yield from stream_generate(
+            get_general_qa(), question, model_name=SESSION_MODELS["general_qa"][1], max_length=256
+        )
+    except Exception as e:
+        yield f"General QA failed: {str(e)}"
@@ -0,0 +1,157 @@
+import random
+import time
+from typing import Dict, List, Optional
+
+from logic.answer_cache import answer_cache, cache_key
+from logic.assistant import SESSION_MODELS, get_model
+from logic.backends import backend_for
+from logic.document_store import content_hash
+from logic.metrics import metrics
+from logic.retrieval import get_index
+
+QUIZ_SIZES = (5, 10, 15, 20)
+OPTIONS_PER_QUESTION = 3
+QUESTION_MAX_LENGTH = 64
+ANSWER_MAX_LENGTH = 32
+
+LEVEL_AUDIENCE = {
+    "Basic": "a 10-year-old",
+    "SHS": "a high school student",
+    "Tertiary": "a university student",
+}
+# Each question is steered to a different subtopic so prompts that share a
+# passage (or have none) do not produce the same question N times.
+SUBTOPIC_ANGLES = [
+    "its definition", "its history", "a key example", "why it matters", "its main parts",
+    "a common misconception", "how it works", "a real-world use", "an important fact", "its causes",
+    "its effects", "a related concept", "a key term", "a famous person or discovery", "how it is measured",
+    "a comparison with something similar", "a problem it solves", "its limits", "how it changed over time",
+    "how to apply it",
+]
+FALLBACK_QUESTIONS = [
+    ("What is the main idea of {topic}?", ["It is a key concept.", "It is a random topic.", "It is not important."]),
+    ("List one important fact about {topic}.", ["It is widely studied.", "It is rarely discussed.", "It is a new discovery."]),
+    ("Why is {topic} important?", ["It has a big impact.", "It is not useful.", "It is only for fun."]),
+]
+FALLBACK_DISTRACTORS = ["None of the above", "It cannot be known", "It has no effect", "It is unrelated"]
+
+
+def quiz_key(topic: str, level: str, n: int, doc_hash: Optional[str] = None) -> str:
+    model = SESSION_MODELS["general_qa"][1]
+    return cache_key(f"quiz:{n}:{topic}", level, f"{model}@{backend_for(model)}", doc_hash or "")
+
+
+def _source_material(topic: str, n: int, context: str, doc_hash: Optional[str]) -> List[Optional[str]]:
+    # One passage per question: the chunks that best match the topic,
+    # reused round-robin when the document has fewer than n of them.
+    if not context:
+        return [None] * n
+    index = get_index(context, doc_hash)
+    passages = index.top_chunks(topic, k=n) or index.chunks[:n]
+    if not passages:
+        return [None] * n
+    return [passages[i % len(passages)] for i in range(n)]
+
+
+def _question_prompt(topic: str, level: str, passage: Optional[str], i: int) -> str:
+    audience = LEVEL_AUDIENCE.get(level, LEVEL_AUDIENCE["Basic"])
+    angle = SUBTOPIC_ANGLES[i % len(SUBTOPIC_ANGLES)]
+    if passage is None:
+        return f"Write one quiz question for {audience} about {topic}, focusing on {angle}."
+    return f"Write one quiz question for {audience} about {topic}, focusing on {angle}, answered by this text: {passage}"
+
+
+def _answer_prompt(question: str, passage: Optional[str]) -> str:
+    if passage is None:
+        return f"Answer briefly: {question}"
+    return f"Answer briefly using the text. Question: {question} Text: {passage}"
+
+
+def _generate(prompts: List[str], max_length: int) -> List[str]:
+    # One scheduler request: all prompts share a single batched generate call.
+    outputs = get_model("general_qa")(prompts, max_length=max_length, truncation=True)
+    return [o["generated_text"].strip() for o in outputs]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split()).rstrip("?!. ")
+
+
+def _build_questions(topic: str, questions: List[str], answers: List[str], seed: str) -> List[Dict]:
+    rng = random.Random(seed)
+    quiz, seen = [], set()
+    usable = [(q, a) for q, a in zip(questions, answers) if q and a]
+    for i, (question, answer) in enumerate(usable):
+        if _normalize(question) in seen:
+            continue
+        seen.add(_normalize(question))
+        # The other questions' answers make plausible wrong options.
+        distractors = []
+        for _, other in usable[i + 1:] + usable[:i]:
+            if _normalize(other) != _normalize(answer) and other not in distractors:
+                distractors.append(other)
+            if len(distractors) == OPTIONS_PER_QUESTION - 1:
+                break
+        for fallback in FALLBACK_DISTRACTORS:
+            if len(distractors) == OPTIONS_PER_QUESTION - 1:
+                break
+            distractors.append(fallback)
+        options = [answer] + distractors
+        rng.shuffle(options)
+        quiz.append({"question": question, "options": options, "correct": options.index(answer)})
+    for i in range(len(quiz), len(questions)):
+        question, options = FALLBACK_QUESTIONS[i % len(FALLBACK_QUESTIONS)]
+        quiz.append({"question": question.format(topic=topic), "options": list(options), "correct": 0})
+    return quiz
+
+
+def cached_quiz(topic: str, level: str, n: int, doc_hash: Optional[str] = None) -> Optional[Dict]:
+    cached = answer_cache.get(quiz_key(topic, level, n, doc_hash))
+    return dict(cached, cached=True) if cached is not None else None
+
+
+def generate_quiz(topic: str, level: str = "Basic", n: int = 5, context: str = "", doc_hash: Optional[str] = None) -> Dict:
+    """Builds an n-question multiple-choice quiz.
+
+    Questions are generated one per passage (or subtopic without a
+    document) in one batched call, then answered in a second one. Results
+    are cached per topic, level, size and source document; if generation
+    fails, template questions are returned and nothing is cached.
+    """
+    if context and doc_hash is None:
+        doc_hash = content_hash(context.encode("utf-8"))
+    cached = cached_quiz(topic, level, n, doc_hash)
+    if cached is not None:
+        return cached
+    key = quiz_key(topic, level, n, doc_hash)
+
+    started = time.perf_counter()
+    with metrics.span("quiz_generate"):
+        try:
+            passages = _source_material(topic, n, context, doc_hash)
+            questions = _generate(
+                [_question_prompt(topic, level, p, i) for i, p in enumerate(passages)], QUESTION_MAX_LENGTH
+            )
+            answers = _generate(
+                [_answer_prompt(q, p) for q, p in zip(questions, passages)], ANSWER_MAX_LENGTH
+            )
+            generated = True
+        except Exception:
+            # Without the model the quiz falls back to template questions.
+            metrics.inc("quiz_generation_errors_total")
+            questions, answers = [""] * n, [""] * n
+            generated = False
+        items = _build_questions(topic, questions, answers, seed=key)
+    quiz = {
+        "topic": topic,
+        "level": level,
+        "questions": items,
+        "source": ("document" if context else "model") if generated else "template",
+        "generated": generated,
+        "seconds": time.perf_counter() - started,
+    }
+    metrics.observe("quiz_questions", len(items))
+    # Template quizzes are not cached, so the next request tries the model again.
+    if generated:
+        answer_cache.put(key, quiz)
+    return dict(quiz, cached=False)
@@ -0,0 +1,43 @@
+import functools
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from logic.metrics import metrics
+
+
+def widget_count() -> int:
+    # Widgets registered so far in the current script or fragment run.
+    ctx = get_script_run_ctx()
+    return len(ctx.widget_ids_this_run) if ctx else 0
+
+
+def record_run(scope: str, started: float, widgets: int):
+    metrics.observe("script_run_seconds", time.perf_counter() - started, scope=scope)
+    metrics.observe("script_run_widgets", widgets, scope=scope)
+    metrics.inc("script_runs_total", scope=scope)
+
+
+@contextmanager
+def track_run(scope: str):
+    # Runs interrupted by st.rerun() or st.stop() are not recorded.
+    started = time.perf_counter()
+    before = widget_count()
+    yield
+    record_run(scope, started, widget_count() - before)
+
+
+def fragment(scope: str, run_every=None):
+    """st.fragment that also records how long each run took and how many widgets it drew."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            with track_run(scope):
+                return fn(*args, **kwargs)
+
+        return st.fragment(body, run_every=run_every)
+
+    return decorator
@@ -0,0 +1,189 @@
+import abc
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Sequence, Tuple
+from urllib.parse import quote, quote_plus
+
+from logic.metrics import metrics
+
+RESOURCES_DIR = "data/resources"
+RESOURCE_CACHE_TTL_SECONDS = int(os.environ.get("EDUMATE_RESOURCE_TTL", str(24 * 3600)))
+# (connect, read) per request, and a cap on the whole fan-out.
+REQUEST_TIMEOUT = (3.05, 5.0)
+FETCH_DEADLINE_SECONDS = 8.0
+FETCH_WORKERS = 4
+POOL_SIZE = 8
+WIKIPEDIA_URL = os.environ.get("EDUMATE_WIKIPEDIA_URL", "https://en.wikipedia.org")
+USER_AGENT = "EduMate/1.0 (personal learning assistant)"
+
+
+class ResourceProvider(abc.ABC):
+    """One source of links for a topic.
+
+    Subclasses set `name` and implement fetch(), returning dicts with
+    "title", "url" and "kind". benchmarks/fake_providers.py has providers
+    that need no network.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def fetch(self, session, topic: str, limit: int, timeout: Tuple[float, float]) -> List[Dict]:
+        ...
+
+
+class WikipediaProvider(ResourceProvider):
+    name = "wikipedia"
+
+    def __init__(self, base_url: str = WIKIPEDIA_URL):
+        self.base_url = base_url.rstrip("/")
+
+    def fetch(self, session, topic, limit, timeout):
+        response = session.get(
+            f"{self.base_url}/w/api.php",
+            params={"action": "query", "list": "search", "srsearch": topic, "srlimit": limit, "format": "json"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return [
+            {
+                "title": item["title"],
+                "url": f"{self.base_url}/wiki/{quote(item['title'].replace(' ', '_'))}",
+                "kind": "article",
+            }
+            for item in response.json()["query"]["search"][:limit]
+        ]
+
+
+class YouTubeSearchProvider(ResourceProvider):
+    name = "youtube"
+
+    def fetch(self, session, topic, limit, timeout):
+        # A search link needs no request, so it works offline.
+        return [
+            {
+                "title": "YouTube Search",
+                "url": f"https://www.youtube.com/results?search_query={quote_plus(topic)}",
+                "kind": "video",
+            }
+        ]
+
+
+DEFAULT_PROVIDERS = (WikipediaProvider(), YouTubeSearchProvider())
+
+
+def _new_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    # Keep-alive connections are reused across topics and sessions; one
+    # quick retry covers a dropped idle connection.
+    retries = Retry(total=1, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ResourceFetcher:
+    """Fans a topic out to every provider at once and keeps results on disk for a while.
+
+    Providers that fail or miss the deadline fall back to their last saved
+    results, however old, so the page still shows links offline.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[ResourceProvider] = DEFAULT_PROVIDERS,
+        cache_dir: str = RESOURCES_DIR,
+        ttl_seconds: int = RESOURCE_CACHE_TTL_SECONDS,
+        timeout: Tuple[float, float] = REQUEST_TIMEOUT,
+        deadline: float = FETCH_DEADLINE_SECONDS,
+        workers: int = FETCH_WORKERS,
+        session_factory: Callable = _new_session,
+    ):
+        self.providers = list(providers)
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.timeout = timeout
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="edumate-resources")
+        self._session_factory = session_factory
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                self._session = self._session_factory()
+            return self._session
+
+    def fetch(self, topic: str, limit: int = 2) -> Dict:
+        """Returns {"resources": {provider: [...]}, "errors": {provider: message}, "stale": [provider, ...]}."""
+        topic = " ".join(topic.split())
+        cached = self._read_cache(topic)
+        now = time.time()
+        resources, errors, stale = {}, {}, []
+        missing = []
+        for provider in self.providers:
+            entry = cached.get(provider.name)
+            if entry and now - entry["fetched_at"] < self.ttl_seconds:
+                metrics.cache_lookup("resources", True, provider=provider.name)
+                resources[provider.name] = entry["resources"][:limit]
+            else:
+                metrics.cache_lookup("resources", False, provider=provider.name)
+                missing.append(provider)
+
+        if missing:
+            futures = {self._executor.submit(self._fetch_one, p, topic, limit): p for p in missing}
+            done, _ = wait(futures, timeout=self.deadline)
+            for future, provider in futures.items():
+                try:
+                    if future not in done:
+                        raise TimeoutError(f"no answer within {self.deadline:g}s")
+                    resources[provider.name] = future.result()
+                    cached[provider.name] = {"fetched_at": now, "resources": resources[provider.name]}
+                except Exception as exc:
+                    metrics.inc("resource_fetch_errors_total", provider=provider.name)
+                    errors[provider.name] = str(exc) or type(exc).__name__
+                    if provider.name in cached:
+                        resources[provider.name] = cached[provider.name]["resources"][:limit]
+                        stale.append(provider.name)
+            self._write_cache(topic, cached)
+        return {"topic": topic, "resources": resources, "errors": errors, "stale": stale}
+
+    def _fetch_one(self, provider: ResourceProvider, topic: str, limit: int) -> List[Dict]:
+        with metrics.span("resource_fetch", provider=provider.name):
+            return provider.fetch(self.session, topic, limit, self.timeout)
+
+    def _cache_path(self, topic: str) -> str:
+        key = hashlib.sha256(topic.lower().encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, topic: str) -> Dict:
+        try:
+            with open(self._cache_path(topic), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, topic: str, entries: Dict):
+        if not entries:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path(topic)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+
+resource_fetcher = ResourceFetcher()
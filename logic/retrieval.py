@@ -0,0 +1,109 @@
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from logic.document_store import content_hash, document_store
+from logic.metrics import metrics
+
+# Chunks are sized so that a chunk plus the question fits one reader window
+# (384 tokens for the squad2 models) without needing doc_stride splitting.
+CHUNK_WORDS = 180
+CHUNK_OVERLAP_WORDS = 40
+TOP_K = 3
+INDEX_CACHE_MAX_ENTRIES = 32
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to "
+    "was what when where which who why will with explain simply like high "
+    "school level provide detailed academic explanation".split()
+)
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_document(text: str, chunk_words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP_WORDS) -> List[str]:
+    words = text.split()
+    if len(words) <= chunk_words:
+        return [text] if text.strip() else []
+    step = chunk_words - overlap
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+class BM25Index:
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        for i, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        n = len(self.chunks)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    @metrics.timed("bm25_search")
+    def search(self, query: str, k: int = TOP_K) -> List[Tuple[int, float]]:
+        scores: Dict[int, float] = {}
+        # Only chunks that share a term with the query are ever scored.
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for i, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        if not ranked:
+            # Nothing matched: fall back to the opening of the document.
+            ranked = [(i, 0.0) for i in range(min(k, len(self.chunks)))]
+        return ranked
+
+    def top_chunks(self, query: str, k: int = TOP_K) -> List[str]:
+        return [self.chunks[i] for i, _ in self.search(query, k)]
+
+
+_indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(text: str, doc_hash: Optional[str] = None) -> BM25Index:
+    doc_hash = doc_hash or content_hash(text.encode("utf-8"))
+    with _indexes_lock:
+        index = _indexes.get(doc_hash)
+        if index is not None:
+            _indexes.move_to_end(doc_hash)
+            metrics.cache_lookup("bm25_index", True)
+            return index
+    metrics.cache_lookup("bm25_index", False)
+
+    with metrics.span("bm25_index"):
+        chunks = document_store.get_artifact(doc_hash, "chunks")
+        if chunks is None:
+            chunks = chunk_document(text)
+            if document_store.get(doc_hash) is not None:
+                document_store.put_artifact(doc_hash, "chunks", chunks)
+        index = BM25Index(chunks)
+
+    with _indexes_lock:
+        _indexes[doc_hash] = index
+        while len(_indexes) > INDEX_CACHE_MAX_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List
+
+from logic.metrics import metrics
+
+MAX_BATCH_SIZE = int(os.environ.get("EDUMATE_MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.environ.get("EDUMATE_MAX_BATCH_WAIT_MS", "10"))
+
+
+class _Request:
+    __slots__ = ("items", "kwargs", "kwargs_key", "future", "enqueued_at")
+
+    def __init__(self, items: List, kwargs: Dict):
+        self.items = items
+        self.kwargs = kwargs
+        self.kwargs_key = repr(sorted(kwargs.items()))
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class _ModelQueue:
+    def __init__(self, name: str, get_pipeline: Callable[[], Any], max_batch_size: int, max_wait_ms: float):
+        self.name = name
+        self.get_pipeline = get_pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: Deque[_Request] = deque()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"inference:{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: List, kwargs: Dict) -> Future:
+        request = _Request(items, kwargs)
+        with self._cond:
+            self._pending.append(request)
+            metrics.set_gauge("scheduler_queue_depth", len(self._pending), model=self.name)
+            self._cond.notify()
+        return request.future
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            first = self._pending[0]
+            # Give concurrent sessions a short window to join this batch.
+            deadline = first.enqueued_at + self.max_wait
+            while self._batch_size(first) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size, leftover = [], 0, deque()
+            while self._pending:
+                request = self._pending.popleft()
+                fits = not batch or size + len(request.items) <= self.max_batch_size
+                # Only requests with identical generation kwargs can share a call.
+                if fits and request.kwargs_key == first.kwargs_key:
+                    batch.append(request)
+                    size += len(request.items)
+                else:
+                    leftover.append(request)
+            self._pending = leftover
+            metrics.set_gauge("scheduler_queue_depth", len(self._pending), model=self.name)
+            return batch
+
+    def _batch_size(self, first: _Request) -> int:
+        return sum(len(r.items) for r in self._pending if r.kwargs_key == first.kwargs_key)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            started = time.perf_counter()
+            for request in batch:
+                metrics.observe("scheduler_queue_wait_seconds", started - request.enqueued_at, model=self.name)
+            items = [item for request in batch for item in request.items]
+            try:
+                pipe = self.get_pipeline()
+                outputs = pipe(items, batch_size=len(items), **batch[0].kwargs)
+                if isinstance(outputs, dict):
+                    outputs = [outputs]
+            except Exception as exc:
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+            metrics.observe("scheduler_batch_size", len(items), model=self.name)
+            metrics.observe("scheduler_inference_seconds", finished - started, model=self.name)
+            metrics.inc("scheduler_requests_total", len(batch), model=self.name)
+            offset = 0
+            for request in batch:
+                request.future.set_result(outputs[offset:offset + len(request.items)])
+                metrics.observe("scheduler_request_seconds", finished - request.enqueued_at, model=self.name)
+                offset += len(request.items)
+
+
+class BatchedPipeline:
+    """Drop-in stand-in for a transformers pipeline whose calls go through the scheduler."""
+
+    def __init__(self, scheduler: "InferenceScheduler", name: str, get_pipeline: Callable[[], Any], task: str):
+        self._scheduler = scheduler
+        self._name = name
+        self._get_pipeline = get_pipeline
+        self.task = task
+
+    def __call__(self, inputs, **kwargs):
+        kwargs.pop("batch_size", None)
+        single = not isinstance(inputs, list)
+        outputs = self._scheduler.submit(
+            self._name, self._get_pipeline, [inputs] if single else inputs, **kwargs
+        ).result()
+        if not single:
+            return outputs
+        # Mirror what the pipeline returns for a single input.
+        return outputs[0] if self.task == "question-answering" else [outputs[0]]
+
+    def __getattr__(self, attr):
+        return getattr(self._get_pipeline(), attr)
+
+
+class InferenceScheduler:
+    """Per-model request queues that group concurrent calls into dynamic batches."""
+
+    def __init__(self, max_batch_size: int = MAX_BATCH_SIZE, max_wait_ms: float = MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, get_pipeline: Callable[[], Any], items: List, **kwargs) -> Future:
+        with self._lock:
+            model_queue = self._queues.get(name)
+            if model_queue is None:
+                model_queue = self._queues[name] = _ModelQueue(
+                    name, get_pipeline, self.max_batch_size, self.max_wait_ms
+                )
+        return model_queue.submit(list(items), kwargs)
+
+    def pipeline(self, name: str, get_pipeline: Callable[[], Any], task: str) -> BatchedPipeline:
+        return BatchedPipeline(self, name, get_pipeline, task)
+
+
+scheduler = InferenceScheduler()
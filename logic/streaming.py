@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Iterator
+
+from logic.metrics import metrics
+
+# Seconds to wait for the next token before giving up on a stalled generate().
+STREAM_TOKEN_TIMEOUT = 120.0
+
+
+def _stop_on(event: threading.Event):
+    import torch
+    from transformers import StoppingCriteria
+
+    class StopOnEvent(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    return StopOnEvent()
+
+
+def stream_generate(pipe, text: str, model_name: str = "", prefix: str = "", **generate_kwargs) -> Iterator[str]:
+    from transformers import StoppingCriteriaList, TextIteratorStreamer
+
+    tokenizer, model = pipe.tokenizer, pipe.model
+    inputs = tokenizer(prefix + text, return_tensors="pt", truncation=True)
+    streamer = TextIteratorStreamer(
+        tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=STREAM_TOKEN_TIMEOUT
+    )
+    # The streamer only supports greedy/sampled decoding, not beam search.
+    generate_kwargs.setdefault("num_beams", 1)
+    # Set when the consumer stops reading, so generate() stops at the next
+    # token instead of running to max_length for nobody.
+    abandoned = threading.Event()
+    generate_kwargs["stopping_criteria"] = StoppingCriteriaList(
+        list(generate_kwargs.get("stopping_criteria") or []) + [_stop_on(abandoned)]
+    )
+    errors = []
+
+    def generate():
+        try:
+            model.generate(**inputs, streamer=streamer, **generate_kwargs)
+        except Exception as exc:
+            errors.append(exc)
+            streamer.end()
+
+    started = time.perf_counter()
+    threading.Thread(target=generate, name=f"stream:{model_name}", daemon=True).start()
+    first_token = True
+    try:
+        for piece in streamer:
+            if not piece:
+                continue
+            if first_token:
+                metrics.observe("time_to_first_token_seconds", time.perf_counter() - started, model=model_name)
+                first_token = False
+            yield piece
+    finally:
+        abandoned.set()
+    if errors:
+        raise errors[0]
+    metrics.observe("generation_seconds", time.perf_counter() - started, model=model_name)
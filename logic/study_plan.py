@@ -0,0 +1,174 @@
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from logic import db
+from logic.assistant import get_model
+from logic.metrics import metrics
+from logic.quiz import LEVEL_AUDIENCE, SUBTOPIC_ANGLES
+
+MAX_WEEKS = 52
+# Long plans are outlined as units first, then each unit is split into weeks.
+WEEKS_PER_UNIT = 4
+TOPIC_MAX_LENGTH = 32
+
+STYLE_ACTIVITIES = {
+    "Visual": "watch a video and sketch a diagram of it",
+    "Auditory": "listen to a lecture or podcast and explain it aloud",
+    "Reading/Writing": "read an article and write a one-page summary",
+    "Kinesthetic": "try a hands-on exercise or experiment",
+}
+
+UPSERT_PLAN_SQL = """
+    INSERT INTO study_plans (id, goal, weeks, level, style, plan, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET plan = excluded.plan, updated_at = excluded.updated_at
+"""
+TOUCH_PLAN_SQL = "UPDATE study_plans SET updated_at = ? WHERE id = ?"
+SELECT_PLAN_SQL = "SELECT plan FROM study_plans WHERE id = ?"
+SELECT_LATEST_PLAN_SQL = "SELECT plan FROM study_plans ORDER BY updated_at DESC LIMIT 1"
+
+
+def init_study_plans():
+    with db.connection() as conn:
+        conn.execute(
+            """
+        CREATE TABLE IF NOT EXISTS study_plans (
+            id TEXT PRIMARY KEY,
+            goal TEXT NOT NULL,
+            weeks INTEGER NOT NULL,
+            level TEXT NOT NULL,
+            style TEXT NOT NULL,
+            plan TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_study_plans_updated ON study_plans(updated_at)")
+
+
+def plan_id(goal: str, weeks: int, level: str, style: str) -> str:
+    payload = json.dumps([" ".join(goal.lower().split()), weeks, level, style])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_plan(plan_id: str) -> Optional[Dict]:
+    with db.connection() as conn:
+        row = conn.execute(SELECT_PLAN_SQL, (plan_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def latest_plan() -> Optional[Dict]:
+    with db.connection() as conn:
+        row = conn.execute(SELECT_LATEST_PLAN_SQL).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _generate(prompts: List[str]) -> List[str]:
+    # One scheduler request per level of the outline, batched in one call.
+    outputs = get_model("general_qa")(prompts, max_length=TOPIC_MAX_LENGTH, truncation=True)
+    return [o["generated_text"].strip().rstrip(".") for o in outputs]
+
+
+def _distinct(topics: List[str], fallback: List[str]) -> List[str]:
+    seen, result = set(), []
+    for topic, default in zip(topics, fallback):
+        key = " ".join(topic.lower().split())
+        if not key or key in seen:
+            topic, key = default, default.lower()
+        seen.add(key)
+        result.append(topic)
+    return result
+
+
+def _unit_sizes(weeks: int) -> List[int]:
+    units = -(-weeks // WEEKS_PER_UNIT)
+    base, extra = divmod(weeks, units)
+    return [base + (1 if i < extra else 0) for i in range(units)]
+
+
+def _outline(goal: str, weeks: int, level: str) -> List[Dict]:
+    audience = LEVEL_AUDIENCE.get(level, LEVEL_AUDIENCE["Basic"])
+    sizes = _unit_sizes(weeks)
+    if len(sizes) == 1:
+        units = [goal]
+    else:
+        units = _distinct(
+            _generate([
+                f"Name one topic, part {i + 1} of {len(sizes)}, in a course on {goal} for {audience}, "
+                f"covering {SUBTOPIC_ANGLES[i % len(SUBTOPIC_ANGLES)]}."
+                for i in range(len(sizes))
+            ]),
+            [f"{goal}: part {i + 1}" for i in range(len(sizes))],
+        )
+    # Every week of every unit is expanded in a single batched call.
+    slots = [(u, k) for u, size in enumerate(sizes) for k in range(size)]
+    subtopics = _distinct(
+        _generate([
+            f"Name one subtopic of {units[u]} to study in week {k + 1} of {sizes[u]} "
+            f"of a course on {goal} for {audience}, covering {SUBTOPIC_ANGLES[k % len(SUBTOPIC_ANGLES)]}."
+            for u, k in slots
+        ]),
+        [f"Subtopic {i + 1} of {goal}" for i in range(len(slots))],
+    )
+    outline = [{"title": unit, "weeks": []} for unit in units]
+    for (u, _), subtopic in zip(slots, subtopics):
+        outline[u]["weeks"].append(subtopic)
+    return outline
+
+
+def _activity(style: str) -> str:
+    for name, activity in STYLE_ACTIVITIES.items():
+        if style.startswith(name):
+            return activity
+    return STYLE_ACTIVITIES["Reading/Writing"]
+
+
+def generate_study_plan(goal: str, weeks: int, level: str = "Basic", style: str = "") -> Dict:
+    """Returns a week-by-week plan, generating it only once per goal, length, level and style.
+
+    Units are outlined in one batched call and all weeks expanded in a
+    second, so each call produces short single-item outputs whatever the
+    plan length. Plans are kept in SQLite and survive reloads.
+    """
+    weeks = max(1, min(int(weeks), MAX_WEEKS))
+    key = plan_id(goal, weeks, level, style)
+    plan = get_plan(key)
+    now = datetime.now().isoformat()
+    # A template plan saved while the model was unavailable is retried.
+    if plan is not None and plan["generated"]:
+        metrics.cache_lookup("study_plan", True)
+        db.write(TOUCH_PLAN_SQL, (now, key))
+        return dict(plan, cached=True)
+    metrics.cache_lookup("study_plan", False)
+
+    started = time.perf_counter()
+    with metrics.span("study_plan_generate"):
+        try:
+            units = _outline(goal, weeks, level)
+            generated = True
+        except Exception:
+            # Without the model the plan still has the right shape.
+            units = [{"title": goal, "weeks": [f"Subtopic {i + 1} of {goal}" for i in range(weeks)]}]
+            generated = False
+    activity = _activity(style)
+    steps = [
+        f"Week {i + 1}: Study {subtopic} ({activity})"
+        for i, subtopic in enumerate(w for unit in units for w in unit["weeks"])
+    ]
+    plan = {
+        "id": key,
+        "goal": goal,
+        "weeks": weeks,
+        "level": level,
+        "style": style,
+        "units": units,
+        "steps": steps,
+        "generated": generated,
+        "seconds": time.perf_counter() - started,
+    }
+    db.write(UPSERT_PLAN_SQL, (key, goal, weeks, level, style, json.dumps(plan), now, now))
+    return dict(plan, cached=False)
@@ -1,35 +1,32 @@
-import pdfplumber
-import pytesseract
 import streamlit as st
-from PIL import Image
-from transformers import pipeline
 
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from logic.assistant import MODEL_DEVICE
+from logic.chunked_summary import stream_long_summary, summarize_long_text
+from logic.model_registry import registry
+from logic.utils import extract_text_from_image, extract_text_from_pdf
 
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
 
+def get_summarizer():
+    # Same keyword arguments as the app's models, so the registry key matches.
+    return registry.get("summarization", "facebook/bart-large-cnn", device=MODEL_DEVICE)
 
-def extract_text_from_pdf(uploaded_file):  # sourcery skip: use-named-expression
-    text = ""
-    with pdfplumber.open(uploaded_file) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
 
-
-def extract_text_from_image(uploaded_file):
-    image = Image.open(uploaded_file)
-    return pytesseract.image_to_string(image)
+def summarize_text(text, progress=None):
+    if len(text.strip()) < 50:
+        return "Text is too short to summarize."
+    return summarize_long_text(
+        get_summarizer(), text, max_length=300, min_length=100, progress=progress
+    )
 
 
-def summarize_text(text):
+def stream_summary(text, progress=None):
     if len(text.strip()) < 50:
-        return "Text is too short to summarize."
-    return summarizer(text, max_length=300, min_length=100, truncation=True)[0][
-        "summary_text"
-    ]
+        yield "Text is too short to summarize."
+        return
+    yield from stream_long_summary(
+        get_summarizer(), text, max_length=300, min_length=100, progress=progress,
+        model_name="facebook/bart-large-cnn",
+    )
 
 
 # sourcery skip: use-fstring-for-concatenation, use-named-expression
@@ -46,9 +43,14 @@ if uploaded_file:
         text = extract_text_from_image(uploaded_file)
 
     if st.button("Summarize"):
-        with st.spinner("Generating summary..."):
-            summary = summarize_text(text)
-            st.subheader("Summary")
-            st.write(summary)
-            st.subheader("Extracted Text")
-            st.text(text[:2000] + "...")
+        progress_bar = st.progress(0.0, text="Generating summary...")
+        st.subheader("Summary")
+        st.write_stream(
+            stream_summary(
+                text,
+                progress=lambda done, total, stage: progress_bar.progress(done / total, text=stage),
+            )
+        )
+        progress_bar.empty()
+        st.subheader("Extracted Text")
+        st.text(text[:2000] + "...")
@@ -1,12 +1,50 @@
 import uuid
 from datetime import datetime
+from itertools import groupby
 import streamlit as st
 
+# Built once per process rather than on every rerun of app.py.
+APP_CSS = """
+    <style>
+    .stChatMessage { padding: 12px; }
+    .stButton button {
+        transition: all 0.2s ease-in-out;
+        border-radius: 6px;
+    }
+    .stButton button:hover {
+        background-color: #ffeb3b20;
+        transform: scale(1.05);
+    }
+    @media only screen and (max-width: 768px) {
+        section[data-testid="stSidebar"] { display: none; }
+        .mobile-sidebar-toggle { display: block !important; margin-bottom: 10px; }
+    }
+    @media only screen and (min-width: 769px) {
+        .mobile-sidebar-toggle { display: none !important; }
+    }
+    </style>
+"""
+DARK_MODE_CSS = """
+    <style>
+    body { background-color: #121212; color: white; }
+    .stTextInput input, .stSelectbox div { background-color: #222; color: white; }
+    </style>
+"""
+
+
+def inject_styles(dark_mode=False):
+    st.markdown(APP_CSS + DARK_MODE_CSS if dark_mode else APP_CSS, unsafe_allow_html=True)
+
+
 def chat_message_ui(chat, is_user=True):
     with st.chat_message("user" if is_user else "assistant"):
-        st.markdown(
-            f"{'👤' if is_user else '🤖'} {chat['message']}", unsafe_allow_html=True
-        )
+        if isinstance(chat["message"], str):
+            st.markdown(
+                f"{'👤' if is_user else '🤖'} {chat['message']}", unsafe_allow_html=True
+            )
+        else:
+            # A token stream: render it as it arrives and keep the final text.
+            chat["message"] = st.write_stream(_prefixed_stream("🤖 ", chat["message"]))[2:]
         st.markdown(f"<small>{chat['timestamp']}</small>", unsafe_allow_html=True)
 
         cols = st.columns([0.1, 0.1, 0.1])
@@ -23,61 +61,96 @@ def chat_message_ui(chat, is_user=True):
                 st.session_state["pin_chat"] = chat["id"]
                 st.toast("", icon="📌")
 
+    return chat["message"]
+
+
+def _prefixed_stream(prefix, chunks):
+    yield prefix
+    yield from chunks
+
+
+PERIOD_ICONS = {"Today": "🕘", "This week": "🗓️", "Older": "🗂️"}
 
-def sidebar_chat_history_ui(chat_list):  # sourcery skip: use-named-expression
-    st.sidebar.subheader("📚 Chat History")
+
+def sidebar_chat_history_ui(
+    pinned_chats, recent_chats, on_prev=None, on_next=None, window_label="", search=None, key_prefix="",
+    on_more_pinned=None,
+):  # sourcery skip: use-named-expression
+    # Renders into the current container, so it can run inside a fragment
+    # placed in the sidebar. Only the current window of chats is drawn.
+    st.subheader("📚 Chat History")
 
     # 🔍 Search bar
-    search_query = st.sidebar.text_input("Search chats...", key="search_chats")
-    filtered_chats = [
-        c for c in chat_list if search_query.lower() in c["title"].lower()
-    ] if search_query else chat_list
+    search_query = st.text_input("Search chats...", key=f"{key_prefix}search_chats")
+    if search_query and search:
+        results = search(search_query)
+        st.subheader("🔍 Results")
+        for chat in results:
+            render_chat_item(chat, key_prefix)
+        if not results:
+            st.caption("No chats match your search.")
+        st.markdown("---")
+        return
 
-    seen_ids = set()
-    pinned_chats = [c for c in filtered_chats if c.get("pinned") and c["id"] not in seen_ids and not seen_ids.add(c["id"])]
     if pinned_chats:
-        st.sidebar.subheader("📌 Pinned")
+        st.subheader("📌 Pinned")
         for chat in pinned_chats:
-            render_chat_item(chat)
+            render_chat_item(chat, key_prefix)
+        if on_more_pinned:
+            st.button("More pinned…", key=f"{key_prefix}history-more-pinned", on_click=on_more_pinned)
+
+    # Chats arrive newest first, so each period is one contiguous run.
+    for period, chats in groupby(recent_chats, key=lambda chat: chat.get("period", "Older")):
+        st.subheader(f"{PERIOD_ICONS.get(period, '⏱️')} {period}")
+        for chat in chats:
+            render_chat_item(chat, key_prefix)
 
-    recent_chats = [c for c in filtered_chats if not c.get("pinned") and c["id"] not in seen_ids and not seen_ids.add(c["id"])]
-    if recent_chats:
-        st.sidebar.subheader("⏱️ Recent")
-        for chat in recent_chats:
-            render_chat_item(chat)
+    if on_prev or on_next:
+        cols = st.columns([0.3, 0.4, 0.3])
+        with cols[0]:
+            st.button("⬅️", key=f"{key_prefix}history-prev", help="Newer chats", on_click=on_prev, disabled=on_prev is None)
+        with cols[1]:
+            st.caption(window_label)
+        with cols[2]:
+            st.button("➡️", key=f"{key_prefix}history-next", help="Older chats", on_click=on_next, disabled=on_next is None)
 
-    st.sidebar.markdown("---")
+    st.markdown("---")
 
 
-def render_chat_item(chat):
-    cols = st.sidebar.columns([0.7, 0.15, 0.15])
+def render_chat_item(chat, key_prefix=""):
+    cols = st.columns([0.7, 0.15, 0.15])
     with cols[0]:
-        if st.button(f"💬 {chat['title']}", key=f"load-{chat['id']}"):
+        if st.button(f"💬 {chat['title']}", key=f"{key_prefix}load-{chat['id']}"):
             st.session_state["active_chat_id"] = chat["id"]
             st.toast("Chat loaded!", icon="📂")
+            # The chat panel lives outside the history fragment.
+            st.rerun()
+        if chat.get("snippet"):
+            st.caption(chat["snippet"])
     with cols[1]:
-        if st.button("📌", key=f"sidebar-pin-{chat['id']}"):
+        if st.button("📌", key=f"{key_prefix}sidebar-pin-{chat['id']}"):
             st.session_state["pin_chat"] = chat["id"]
     with cols[2]:
-        if st.button("⋮", key=f"menu-{chat['id']}"):
+        if st.button("⋮", key=f"{key_prefix}menu-{chat['id']}"):
             st.session_state["show_menu_for"] = chat["id"]
     
     if st.session_state.get("show_menu_for") == chat["id"]:
         with st.expander("Chat Options", expanded=True):
             st.markdown("<div style='font-size: 0.9em;'>", unsafe_allow_html=True)
-            if st.button("✏️ Edit Chat Title", key=f"edit-title-{chat['id']}", help="Edit the title of this chat"):
+            if st.button("✏️ Edit Chat Title", key=f"{key_prefix}edit-title-{chat['id']}", help="Edit the title of this chat"):
                 st.session_state["edit_title_for"] = chat["id"]
                 st.session_state["show_menu_for"] = None
                 st.toast("Edit mode enabled!", icon="✏️")
-            if st.button("🗑️ Delete Chat", key=f"delete-chat-{chat['id']}", help="Delete this chat"):
+            if st.button("🗑️ Delete Chat", key=f"{key_prefix}delete-chat-{chat['id']}", help="Delete this chat"):
                 st.session_state["delete_chat"] = chat["id"]
                 st.session_state["show_menu_for"] = None
                 st.toast("Chat deleted!", icon="🗑️")
-            if st.button("📌 Pin/Unpin", key=f"pin-chat-{chat['id']}", help="Pin or unpin this chat"):
+                st.rerun()
+            if st.button("📌 Pin/Unpin", key=f"{key_prefix}pin-chat-{chat['id']}", help="Pin or unpin this chat"):
                 st.session_state["pin_chat"] = chat["id"]
                 st.session_state["show_menu_for"] = None
                 st.toast("Pin toggled!", icon="📌")
-            if st.button("✕ Close", key=f"close-modal-{chat['id']}", help="Close this menu"):
+            if st.button("✕ Close", key=f"{key_prefix}close-modal-{chat['id']}", help="Close this menu"):
                 st.session_state["show_menu_for"] = None
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -93,8 +166,15 @@ def user_input_ui(pause_key="pause"):
             st.session_state["attach_mode"] = True
     with col3:
         paused = st.session_state.get("paused", False)
-        if st.button("⏸️" if not paused else "▶️", key=pause_key, help="Pause" if not paused else "Resume"):
-            st.session_state["paused"] = not paused
-            st.toast("Paused!" if not paused else "Resumed!", icon="⏸️" if not paused else "▶️")
-            st.experimental_rerun()
+        # Toggled in a callback so the button label is right on this run.
+        st.button(
+            "⏸️" if not paused else "▶️", key=pause_key, help="Pause" if not paused else "Resume",
+            on_click=_toggle_pause,
+        )
     return user_input
+
+
+def _toggle_pause():
+    paused = not st.session_state.get("paused", False)
+    st.session_state["paused"] = paused
+    st.toast("Paused!" if paused else "Resumed!", icon="⏸️" if paused else "▶️")
@@ -1,21 +1,150 @@
-import pdfplumber
-import pytesseract
-from PIL import Image
+import io
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
+from logic.metrics import metrics
+from logic.ocr import OCR_DPI, ocr_image, ocr_images
 
-def extract_text_from_pdf(pdf_file):     # sourcery skip: use-named-expression
+# Documents with fewer pages than this are extracted in-process; spinning up
+# worker processes costs more than it saves on short handouts.
+PARALLEL_PAGE_THRESHOLD = 48
+PAGES_PER_TASK = 16
 
-    text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text.strip()
+PdfPage = namedtuple("PdfPage", ["number", "total", "text"])
+
+_worker_pdf = None
+_worker_ocr_fallback = True
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _read_bytes(pdf_file) -> bytes:
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def _page_texts(pdf, span: Tuple[int, int], ocr_fallback: bool, ocr_workers: Optional[int] = None) -> List[str]:
+    texts, scanned = [], []
+    for number in range(*span):
+        page = pdf.pages[number]
+        text = page.extract_text() or ""
+        # Pages without a text layer are scans; render them for OCR.
+        if ocr_fallback and not text.strip():
+            scanned.append((len(texts), page.to_image(resolution=OCR_DPI).original))
+        texts.append(text)
+        page.close()
+    if scanned:
+        ocr_texts = ocr_images([image for _, image in scanned], workers=ocr_workers)
+        for (index, _), text in zip(scanned, ocr_texts):
+            texts[index] = text
+    return texts
+
+
+def _stream_page_texts(pdf, start: int, stop: int, ocr_fallback: bool, ocr_workers: int) -> Iterator[Tuple[int, str]]:
+    # Text-layer pages are yielded as soon as they are read. Scans are held
+    # back until there are enough to keep the OCR pool busy, together with
+    # any text pages behind them, so pages still come out in order.
+    pending, scanned = [], []
+    for number in range(start, stop):
+        page = pdf.pages[number]
+        text = page.extract_text() or ""
+        if ocr_fallback and not text.strip():
+            scanned.append((len(pending), page.to_image(resolution=OCR_DPI).original))
+        page.close()
+        pending.append([number, text])
+        if not scanned:
+            yield from map(tuple, pending)
+            pending = []
+        elif len(scanned) >= ocr_workers:
+            yield from _flush_scans(pending, scanned, ocr_workers)
+            pending, scanned = [], []
+    if pending:
+        yield from _flush_scans(pending, scanned, ocr_workers)
+
+
+def _flush_scans(pending: List[list], scanned: List[tuple], ocr_workers: int) -> Iterator[Tuple[int, str]]:
+    if scanned:
+        ocr_texts = ocr_images([image for _, image in scanned], workers=ocr_workers)
+        for (index, _), text in zip(scanned, ocr_texts):
+            pending[index][1] = text
+    return map(tuple, pending)
+
+
+def _init_page_worker(data: bytes, ocr_fallback: bool):
+    global _worker_pdf, _worker_ocr_fallback
+    import pdfplumber
+
+    _worker_pdf = pdfplumber.open(io.BytesIO(data))
+    _worker_ocr_fallback = ocr_fallback
+
+
+def _extract_page_span(span: Tuple[int, int]) -> List[str]:
+    # Each worker is already one of several processes, so OCR stays serial here.
+    return _page_texts(_worker_pdf, span, _worker_ocr_fallback, ocr_workers=1)
+
+
+def iter_pdf_pages(
+    pdf_file,
+    page_range: Optional[Tuple[int, int]] = None,
+    workers: Optional[int] = None,
+    ocr_fallback: bool = True,
+) -> Iterator[PdfPage]:
+    # page_range is a zero-based, end-exclusive (start, stop) pair; pages
+    # outside it are never parsed.
+    import pdfplumber
+
+    data = _read_bytes(pdf_file)
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        total = len(pdf.pages)
+        start, stop = page_range or (0, total)
+        start, stop = max(start, 0), min(stop, total)
+        workers = workers or available_cpus()
+        if workers == 1 or stop - start < PARALLEL_PAGE_THRESHOLD:
+            for number, text in _stream_page_texts(pdf, start, stop, ocr_fallback, ocr_workers=workers):
+                yield PdfPage(number, total, text)
+            return
+
+    spans = [(s, min(s + PAGES_PER_TASK, stop)) for s in range(start, stop, PAGES_PER_TASK)]
+    # Spawned, not forked: this process runs model, writer and OCR threads
+    # whose locks a forked child could inherit held.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_page_worker,
+        initargs=(data, ocr_fallback),
+    ) as pool:
+        # map() keeps page order while later spans are still being extracted.
+        for span, texts in zip(spans, pool.map(_extract_page_span, spans)):
+            for number, text in enumerate(texts, start=span[0]):
+                yield PdfPage(number, total, text)
+
+
+@metrics.timed("pdf_extract")
+def extract_pages_from_pdf(pdf_file, page_range: Optional[Tuple[int, int]] = None) -> List[str]:
+    return [page.text for page in iter_pdf_pages(pdf_file, page_range)]
+
+
+def extract_text_from_pdf(pdf_file, page_range: Optional[Tuple[int, int]] = None):
+    pages = extract_pages_from_pdf(pdf_file, page_range)
+    return "\n".join(page for page in pages if page).strip()
 
 
 def extract_text_from_image(image_file):
+    from PIL import Image
 
     image = Image.open(image_file)
-    text = pytesseract.image_to_string(image)
-    return text.strip()
+    return ocr_image(image)
@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from logic.metrics import metrics
+from logic.model_registry import registry
+
+ModelSpec = Tuple[str, str, Dict]
+
+
+class Warmup:
+    """Loads heavy modules and models on a background thread, once per process.
+
+    The first page renders straight away; anything that needs a model before
+    the warmup reaches it simply loads it itself, and the registry makes sure
+    each model is still only loaded once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+        self.error: Optional[str] = None
+
+    def start(self, models: Iterable[ModelSpec]) -> bool:
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(
+                target=self._run, args=(list(models),), name="edumate-warmup", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self, models):
+        started = time.perf_counter()
+        try:
+            import transformers  # noqa: F401  (the slowest import by far)
+
+            metrics.observe("warmup_seconds", time.perf_counter() - started, stage="import")
+            for task, model, kwargs in models:
+                loaded = time.perf_counter()
+                registry.get(task, model, **kwargs)
+                metrics.observe("warmup_seconds", time.perf_counter() - loaded, stage=model)
+        except Exception as exc:
+            # Models that failed here are retried, and the error shown, on first use.
+            self.error = str(exc)
+        finally:
+            metrics.observe("warmup_seconds", time.perf_counter() - started, stage="total")
+            self._done.set()
+
+
+warmup = Warmup()